@@ -0,0 +1,62 @@
+"""Admission control for the routes that do database work under load.
+
+When voting opens, every worker thread can end up blocked on Mongo while new
+requests keep queueing behind them until clients time out and retry, which
+only adds load. The controller caps the requests doing DB work at once in
+this worker, lets a few more wait briefly in a bounded queue, and rejects the
+rest straight away so the app can answer 503 with a Retry-After computed from
+the observed service time. Admitted requests keep a bounded latency, and
+rejected clients back off instead of piling up.
+"""
+import math
+import threading
+import time
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent=8, max_queue=16, queue_timeout=0.5, max_retry_after=30):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_retry_after = max_retry_after
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = 0
+        self.service_time = 0.05  # moving average, in seconds
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        """Take a slot, waiting up to queue_timeout; returns False when the request should be shed"""
+        with self.cond:
+            if self.in_flight < self.max_concurrent and not self.waiting:
+                self.in_flight += 1
+                return True
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                return False
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_flight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed += 1
+                        return False
+                    self.cond.wait(remaining)
+                self.in_flight += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self, elapsed):
+        with self.cond:
+            self.in_flight -= 1
+            self.service_time = 0.9 * self.service_time + 0.1 * elapsed
+            self.cond.notify()
+
+    def retry_after(self):
+        """Seconds until the current backlog should have drained, at the observed service time"""
+        backlog = self.in_flight + self.waiting + 1
+        seconds = self.service_time * backlog / self.max_concurrent
+        return min(max(1, math.ceil(seconds)), self.max_retry_after)
@@ -1,28 +1,65 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, make_response
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, make_response, send_from_directory
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_pymongo import PyMongo
+from markupsafe import Markup
+from pymongo.read_preferences import Primary, SecondaryPreferred
 from bson.objectid import ObjectId
 from datetime import datetime
 from dotenv import load_dotenv
 from flask_wtf import FlaskForm, CSRFProtect
+from flask_wtf.csrf import generate_csrf
 from wtforms import StringField, SubmitField, SelectField
 from wtforms.validators import DataRequired, Length
+from functools import wraps
 import os
 import random
+import time
 import uuid
 
+import election_import
+import http_cache
+from admission import AdmissionController
+import merkle
+import profiler
+import resync_index
+from ballot_cache import BallotCache
+from dashboard_cache import DashboardCache
+from schedule_cache import ScheduleCache
+from login_filter import LoginFilter
+from student_search import StudentIndex
+from voter_roll import VoterRoll
+from vote4campus import idempotency
+from vote4campus.db import ensure_indexes
+
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-super-secret-key-here'  # Hardcoded for testing
-app.config['MONGO_URI'] = 'mongodb://localhost:27017/college_voting'  # Hardcoded for testing
+app.config['MONGO_URI'] = os.getenv('MONGO_URI', 'mongodb://localhost:27017/college_voting')
 app.config['UPLOAD_FOLDER'] = 'static/uploads'  # Folder for storing uploaded images
 
 # Create upload folder if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-mongo = PyMongo(app)
+mongo = PyMongo(app, event_listeners=profiler.mongo_listeners())
+profiler.init_app(app)
+http_cache.init_app(app)
+
+# Read routing: heavy admin analytics may read from secondaries (bounded staleness),
+# while ballot writes and has_voted checks always stay on the primary.
+# Override per endpoint with READ_ROUTES="admin_dashboard=primary,export_voters=analytics".
+READ_PREFERENCES = {
+    'primary': Primary(),
+    'analytics': SecondaryPreferred(max_staleness=int(os.getenv('ANALYTICS_MAX_STALENESS', 120)))
+}
+app.config['READ_ROUTES'] = {
+    'admin_dashboard': 'analytics',
+    'export_voters': 'analytics'
+}
+for route in filter(None, os.getenv('READ_ROUTES', '').split(',')):
+    endpoint, _, target = route.partition('=')
+    app.config['READ_ROUTES'][endpoint.strip()] = target.strip()
 
 # Flask-Login setup
 login_manager = LoginManager()
@@ -32,6 +69,39 @@ login_manager.login_view = 'login'
 # Initialize CSRF protection
 csrf = CSRFProtect(app)
 
+# Rejects unknown (student_id, mobile) pairs before they reach Mongo
+login_filter = LoginFilter(lambda: mongo.db.users, refresh_interval=int(os.getenv('LOGIN_FILTER_REFRESH', 30)),
+                           resync_interval=int(os.getenv('LOGIN_FILTER_RESYNC', 300)))
+
+# Bitset index of who has voted, per branch/section
+voter_roll = VoterRoll(lambda: mongo.db.users, resync_interval=int(os.getenv('VOTER_ROLL_RESYNC', 300)))
+
+# Sorted prefix index over student_id and name for admin search
+student_index = StudentIndex(lambda: mongo.db.users, resync_interval=int(os.getenv('STUDENT_INDEX_RESYNC', 300)))
+
+# Build the roll indexes now, in the background, rather than on the first logins after a worker starts
+if os.getenv('PRELOAD_INDEXES', '1') == '1':
+    resync_index.preload(login_filter, voter_roll, student_index)
+
+# Positions/candidates, reloaded only when the catalog version changes
+ballot_cache = BallotCache(lambda: mongo.db)
+
+# Voting schedule, reloaded only when its version changes
+schedule_cache = ScheduleCache(lambda: mongo.db)
+
+# Append-only Merkle tree of ballot receipts
+receipt_tree = merkle.ReceiptTree(lambda: mongo.db)
+
+# Caps concurrent login/OTP/ballot DB work in this worker and sheds the excess with 503
+admission = AdmissionController(
+    max_concurrent=int(os.getenv('ADMISSION_MAX_CONCURRENT', 8)),
+    max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', 16)),
+    queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 0.5)))
+
+# Last admin dashboard snapshot, refreshed in the background once older than DASHBOARD_MAX_AGE seconds
+dashboard_cache = DashboardCache(lambda: mongo.db, lambda: dashboard_data(read_db('admin_dashboard')),
+                                 max_age=float(os.getenv('DASHBOARD_MAX_AGE', 10)))
+
 # Removed Twilio integration as per user request
 
 # WTForms
@@ -67,12 +137,147 @@ class User(UserMixin):
 def load_user(user_id):
     return User.get(user_id)
 
+def validate_ballot(votes, positions, nominees):
+    """Return an error message for an invalid ballot, or None if it is valid.
+
+    Shared by the sync routes and the asyncio serving path so both apply the
+    same rules to {position_id: nominee_id} submissions.
+    """
+    positions = {str(p['_id']): p for p in positions}
+    nominees = {str(n['_id']): n for n in nominees}
+    if len(votes) != len(positions):
+        return f'Please vote for all positions. Expected {len(positions)} positions, received {len(votes)}.'
+    for position_id, nominee_id in votes.items():
+        if position_id not in positions:
+            return f'Invalid position ID: {position_id}'
+        nominee = nominees.get(nominee_id)
+        if not nominee:
+            return f'Invalid nominee ID: {nominee_id}'
+        if nominee.get('position_id') != position_id:
+            return f'Nominee {nominee_id} does not belong to position {position_id}'
+    return None
+
+def build_vote_documents(user, votes, receipt=None):
+    """Build the votes collection documents for a validated ballot
+
+    receipt is the {'receipt', 'receipt_nonce', 'leaf_index'} of the ballot's
+    Merkle leaf, stored on every vote so audits can recompute it.
+    """
+    now = datetime.utcnow()
+    return [{
+        'user_id': user.id,
+        'student_id': user.student_id,
+        'position_id': position_id,
+        'nominee_id': nominee_id,
+        'timestamp': now,
+        'branch': user.branch,
+        'section': user.section,
+        **(receipt or {})
+    } for position_id, nominee_id in votes.items()]
+
+def format_schedule(schedule):
+    """Convert a stored voting schedule into the string form sent to clients"""
+    return {
+        'start_date': schedule['start_date'].strftime('%Y-%m-%d') if isinstance(schedule['start_date'], datetime) else schedule['start_date'],
+        'end_date': schedule['end_date'].strftime('%Y-%m-%d') if isinstance(schedule['end_date'], datetime) else schedule['end_date'],
+        'start_time': schedule['start_time'].strftime('%H:%M') if isinstance(schedule['start_time'], datetime) else schedule['start_time'],
+        'end_time': schedule['end_time'].strftime('%H:%M') if isinstance(schedule['end_time'], datetime) else schedule['end_time']
+    }
+
+def voting_status(schedule):
+    """Build the /check_voting_status payload for a stored schedule (or None)"""
+    if schedule_is_active(schedule):
+        return {'is_active': True}
+    if schedule:
+        formatted = format_schedule(schedule)
+        return {
+            'is_active': False,
+            'message': f"Voting is not active. Voting period: {formatted['start_date']} to {formatted['end_date']}, {formatted['start_time']} to {formatted['end_time']}"
+        }
+    return {
+        'is_active': False,
+        'message': 'Voting schedule has not been set.'
+    }
+
+def idempotent(view):
+    """Replay the stored response when a request repeats an Idempotency-Key"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(idempotency.IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+
+        scoped = idempotency.scoped_key(current_user.id, key)
+        try:
+            claimed_at, existing = idempotency.claim(mongo.db.idempotency_keys, scoped)
+        except Exception as e:
+            print(f"Error claiming idempotency key: {str(e)}")
+            return view(*args, **kwargs)
+        if claimed_at is None:
+            body, status = idempotency.replay(existing)
+            return jsonify(body), status
+
+        response = None
+        try:
+            response = view(*args, **kwargs)
+            return response
+        finally:
+            data = response.get_json(silent=True) if response is not None else None
+            try:
+                idempotency.finish(mongo.db.idempotency_keys, scoped, claimed_at, data)
+            except Exception as e:
+                # The ballot's own response stands; an unreleased claim lapses after CLAIM_LEASE
+                print(f"Error finishing idempotency key: {str(e)}")
+    return wrapper
+
+def busy_json(retry_after):
+    return jsonify({
+        'success': False,
+        'message': 'The server is busy. Please try again shortly.',
+        'retry_after': retry_after
+    })
+
+def admitted(busy=busy_json):
+    """Run POSTs to a view under admission control; busy(retry_after) builds the 503 body"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method == 'GET':
+                return view(*args, **kwargs)
+
+            if not admission.acquire():
+                retry_after = admission.retry_after()
+                response = make_response(busy(retry_after), 503)
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+
+            started = time.monotonic()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                admission.release(time.monotonic() - started)
+        return wrapper
+    return decorator
+
+def busy_login(retry_after):
+    # The form keeps the submitted values, and login.html resubmits it after retry_after
+    flash('The server is busy. Retrying your login automatically...', 'warning')
+    return render_template('login.html', form=LoginForm(), otp_form=OTPForm(), retry_after=retry_after)
+
+def read_db(endpoint=None):
+    """Database handle for an endpoint's reads (default: the current one), per app.config['READ_ROUTES']"""
+    target = app.config['READ_ROUTES'].get(endpoint or request.endpoint, 'primary')
+    if target == 'primary':
+        return mongo.db
+    return mongo.db.with_options(read_preference=READ_PREFERENCES[target])
+
 # Routes
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/login', methods=['GET', 'POST'])
+@admitted(busy_login)
 def login():
     form = LoginForm()
     otp_form = OTPForm()
@@ -86,10 +291,12 @@ def login():
                 mobile = form.mobile_number.data.strip()
                 user_type = form.user_type.data
 
-                user_data = mongo.db.users.find_one({
-                    'student_id': student_id,
-                    'mobile': mobile
-                })
+                user_data = None
+                if login_filter.might_contain(student_id, mobile):
+                    user_data = mongo.db.users.find_one({
+                        'student_id': student_id,
+                        'mobile': mobile
+                    })
 
                 if user_data:
                     # Check if user is trying to login as admin
@@ -117,6 +324,7 @@ def login():
     return render_template('login.html', form=form, otp_form=otp_form)
 
 @app.route('/verify_otp', methods=['POST'])
+@admitted()
 def verify_otp():
     print("OTP verification started...")
     form = OTPForm()
@@ -180,23 +388,34 @@ def voting_page():
             flash('You have already voted!')
             return redirect(url_for('index'))
 
-        # Get positions and candidates
-        positions = list(mongo.db.positions.find())
-        for position in positions:
-            position['_id'] = str(position['_id'])
-            candidates = list(mongo.db.nominees.find({'position_id': str(position['_id'])}))
-            for candidate in candidates:
-                candidate['_id'] = str(candidate['_id'])
-            position['candidates'] = candidates
-
-        return render_template('voting.html', positions=positions)
+        # The page is the catalog plus this session's CSRF token, so a client already holding
+        # it for this catalog version gets a 304 without any template work. Tags roll over every
+        # half CSRF lifetime so a revalidated page never carries an expired token.
+        version = ballot_cache.current_version()
+        generate_csrf()  # makes sure the session holds its raw CSRF token
+        token_window = (app.config.get('WTF_CSRF_TIME_LIMIT') or 3600) // 2
+        etag = http_cache.make_etag('voting', version, current_user.id,
+                                    session.get(app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token')),
+                                    int(time.time() // token_window))
+        if not session.get('_flashes'):
+            cached = http_cache.not_modified(etag)
+            if cached:
+                return cached
+
+        # The ballot body is identical for every student, so it is rendered once per catalog
+        # version and only the page shell (CSRF token, flashes) is rendered per request
+        ballot = ballot_cache.rendered(lambda positions: Markup(render_template('ballot.html', positions=positions)), version)
+
+        return http_cache.set_validators(make_response(render_template('voting.html', ballot=ballot)), etag)
     except Exception as e:
         print(f"Error in voting_page: {str(e)}")  # Add logging
         flash('An error occurred while loading the voting page. Please try again.', 'danger')
         return redirect(url_for('index'))
 
 @app.route('/submit_vote', methods=['POST'])
+@admitted()
 @login_required
+@idempotent
 def submit_vote():
     try:
         # Prevent admin from voting
@@ -224,40 +443,37 @@ def submit_vote():
         if user.get('has_voted', False):
             return jsonify({'success': False, 'message': 'You have already voted!'})
 
-        # Process votes
-        for position_id, nominee_id in votes.items():
-            # Validate position and nominee exist
-            position = mongo.db.positions.find_one({'_id': ObjectId(position_id)})
-            nominee = mongo.db.nominees.find_one({'_id': ObjectId(nominee_id)})
-            
-            if not position:
-                return jsonify({'success': False, 'message': f'Invalid position ID: {position_id}'})
-            if not nominee:
-                return jsonify({'success': False, 'message': f'Invalid nominee ID: {nominee_id}'})
-            if nominee.get('position_id') != str(position['_id']):
-                return jsonify({'success': False, 'message': f'Nominee {nominee_id} does not belong to position {position_id}'})
-
-            # Record vote
-            vote = {
-                'user_id': current_user.id,
-                'student_id': current_user.student_id,
-                'position_id': position_id,
-                'nominee_id': nominee_id,
-                'timestamp': datetime.utcnow(),
-                'branch': current_user.branch,
-                'section': current_user.section
-            }
-            mongo.db.votes.insert_one(vote)
+        # Validate positions and nominees in one query instead of one per vote
+        nominees = mongo.db.nominees.find({'_id': {'$in': [ObjectId(n) for n in votes.values()]}})
+        error = validate_ballot(votes, all_positions, nominees)
+        if error:
+            return jsonify({'success': False, 'message': error})
+
+        # Record votes with the ballot's receipt, then link its leaf into the Merkle tree.
+        # The leaf is linked even if the insert fails, or it would block every later proof.
+        receipt, nonce = merkle.new_receipt(votes)
+        leaf_index = receipt_tree.append(receipt)
+        try:
+            mongo.db.votes.insert_many(build_vote_documents(current_user, votes, {
+                'receipt': receipt,
+                'receipt_nonce': nonce,
+                'leaf_index': leaf_index
+            }))
+        finally:
+            receipt_tree.complete(leaf_index, receipt)
 
         # Update user's voting status
         mongo.db.users.update_one(
             {'_id': ObjectId(current_user.id)},
             {'$set': {'has_voted': True, 'voted_at': datetime.utcnow()}}
         )
+        voter_roll.mark_voted(current_user.student_id)
 
         return jsonify({
             'success': True, 
             'message': 'Vote submitted successfully!', 
+            'receipt': receipt,
+            'leaf_index': leaf_index,
             'redirect': url_for('index')
         })
 
@@ -268,38 +484,62 @@ def submit_vote():
             'message': 'An error occurred while submitting your vote. Please try again.'
         })
 
-@app.route('/admin')
-@login_required
-def admin_dashboard():
-    if not current_user.is_admin:
-        return redirect(url_for('index'))
+@app.route('/verify_receipt')
+def verify_receipt():
+    try:
+        receipt = request.args.get('receipt', '').strip().lower()
+        if not receipt:
+            return jsonify({'success': False, 'message': 'Receipt is required'})
+
+        vote = mongo.db.votes.find_one({'receipt': receipt}, {'leaf_index': 1})
+        if not vote:
+            return jsonify({'success': False, 'message': 'Receipt not found'})
 
+        size, root, path = receipt_tree.proof(vote['leaf_index'])
+        return jsonify({
+            'success': True,
+            'receipt': receipt,
+            'leaf_index': vote['leaf_index'],
+            'tree_size': size,
+            'root': root.hex(),
+            'proof': [h.hex() for h in path],
+            'verified': merkle.verify_proof(bytes.fromhex(receipt), vote['leaf_index'], size, path, root)
+        })
+    except merkle.TreeIncomplete:
+        return jsonify({'success': False, 'message': 'Ballots are being recorded. Please try again shortly.'})
+    except Exception as e:
+        print(f"Error in verify_receipt: {str(e)}")
+        return jsonify({'success': False, 'message': 'An error occurred. Please try again.'})
+
+def dashboard_data(db):
+    """Everything admin.html shows, computed from scratch"""
     # Get all users with their voting status, excluding admins
-    users = list(mongo.db.users.find({'is_admin': {'$ne': True}}))
+    users = list(db.users.find({'is_admin': {'$ne': True}}))
     total_registered = len(users)  # Total number of registered students
     
     # Get actual votes cast
-    total_votes_cast = len(mongo.db.votes.distinct('student_id'))  # Count of unique voters
+    total_votes_cast = len(db.votes.distinct('student_id'))  # Count of unique voters
     
-    # Add vote IDs to users who have voted
+    # Add vote IDs to users who have voted (one aggregation instead of a lookup per user)
+    vote_ids = {row['_id']: row['vote_id'] for row in db.votes.aggregate([
+        {'$group': {'_id': '$student_id', 'vote_id': {'$min': '$_id'}}}
+    ])}
     for user in users:
-        if user.get('has_voted'):
-            vote = mongo.db.votes.find_one({'student_id': user['student_id']})
-            if vote:
-                user['vote_id'] = str(vote['_id'])
+        if user.get('has_voted') and user['student_id'] in vote_ids:
+            user['vote_id'] = str(vote_ids[user['student_id']])
     
-    positions = list(mongo.db.positions.find())
-    branches = mongo.db.users.distinct('branch', {'is_admin': {'$ne': True}})
-    sections = mongo.db.users.distinct('section', {'is_admin': {'$ne': True}})
+    positions = list(db.positions.find())
+    branches = db.users.distinct('branch', {'is_admin': {'$ne': True}})
+    sections = db.users.distinct('section', {'is_admin': {'$ne': True}})
 
     # Get votes per branch (only counting actual votes)
     branch_stats = {}
     for branch in branches:
         # Count unique voters per branch
-        branch_voters = mongo.db.votes.distinct('student_id', {'branch': branch})
+        branch_voters = db.votes.distinct('student_id', {'branch': branch})
         branch_votes = len(branch_voters)
         # Count total students in branch
-        branch_total = mongo.db.users.count_documents({'branch': branch, 'is_admin': {'$ne': True}})
+        branch_total = db.users.count_documents({'branch': branch, 'is_admin': {'$ne': True}})
         branch_stats[branch] = {
             'total_users': branch_total,
             'voted': branch_votes,
@@ -310,10 +550,10 @@ def admin_dashboard():
     section_stats = {}
     for section in sections:
         # Count unique voters per section
-        section_voters = mongo.db.votes.distinct('student_id', {'section': section})
+        section_voters = db.votes.distinct('student_id', {'section': section})
         section_votes = len(section_voters)
         # Count total students in section
-        section_total = mongo.db.users.count_documents({'section': section, 'is_admin': {'$ne': True}})
+        section_total = db.users.count_documents({'section': section, 'is_admin': {'$ne': True}})
         section_stats[section] = {
             'total_users': section_total,
             'voted': section_votes,
@@ -322,15 +562,15 @@ def admin_dashboard():
 
     # Get detailed candidate statistics
     for position in positions:
-        candidates = list(mongo.db.nominees.find({'position_id': str(position['_id'])}))
+        candidates = list(db.nominees.find({'position_id': str(position['_id'])}))
         for candidate in candidates:
             # Get total votes for this candidate
-            candidate_votes = mongo.db.votes.count_documents({'nominee_id': str(candidate['_id'])})
+            candidate_votes = db.votes.count_documents({'nominee_id': str(candidate['_id'])})
             
             # Get votes by branch for this candidate
             branch_votes = {}
             for branch in branches:
-                branch_votes[branch] = mongo.db.votes.count_documents({
+                branch_votes[branch] = db.votes.count_documents({
                     'nominee_id': str(candidate['_id']),
                     'branch': branch
                 })
@@ -343,23 +583,34 @@ def admin_dashboard():
         position['candidates'] = candidates
 
     # Get list of users who haven't voted (excluding admins)
-    non_voters = list(mongo.db.users.find({
+    non_voters = list(db.users.find({
         'is_admin': {'$ne': True},
-        'student_id': {'$nin': mongo.db.votes.distinct('student_id')}  # Exclude students who have voted
+        'student_id': {'$nin': db.votes.distinct('student_id')}  # Exclude students who have voted
     }))
     for user in non_voters:
         user['_id'] = str(user['_id'])
 
-    return render_template('admin.html',
-                         users=users,
-                         positions=positions,
-                         branches=branches,
-                         sections=sections,
-                         total_voters=total_registered,  # Total registered students
-                         total_votes=total_votes_cast,   # Total actual votes cast
-                         branch_stats=branch_stats,
-                         section_stats=section_stats,
-                         non_voters=non_voters)
+    return {
+        'users': users,
+        'positions': positions,
+        'branches': branches,
+        'sections': sections,
+        'total_voters': total_registered,  # Total registered students
+        'total_votes': total_votes_cast,   # Total actual votes cast
+        'branch_stats': branch_stats,
+        'section_stats': section_stats,
+        'non_voters': non_voters
+    }
+
+@app.route('/admin')
+@login_required
+def admin_dashboard():
+    if not current_user.is_admin:
+        return redirect(url_for('index'))
+
+    response = make_response(render_template('admin.html', **dashboard_cache.get()))
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
 
 @app.route('/admin/voting_stats')
 @login_required
@@ -370,21 +621,66 @@ def voting_stats():
     branch = request.args.get('branch')
     section = request.args.get('section')
 
-    query = {}
-    if branch:
-        query['branch'] = branch
-    if section:
-        query['section'] = section
+    # Popcounts over the voter roll bitsets instead of a users scan
+    return jsonify(voter_roll.turnout(branch, section))
 
-    users = list(mongo.db.users.find(query))
-    voted = sum(1 for user in users if user.get('has_voted', False))
+@app.route('/admin/non_voters')
+@login_required
+def non_voters():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized'})
 
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 100)), 1), 1000)
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'})
+
+    student_ids, total = voter_roll.non_voters(request.args.get('branch'), request.args.get('section'), page, per_page)
+    # One indexed lookup for the page's details, returned in roll order
+    users = {u['student_id']: u for u in mongo.db.users.find(
+        {'student_id': {'$in': student_ids}}, {'_id': 0, 'student_id': 1, 'name': 1, 'branch': 1, 'section': 1})}
     return jsonify({
-        'total': len(users),
-        'voted': voted,
-        'not_voted': len(users) - voted
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'students': [users[sid] for sid in student_ids if sid in users]
     })
 
+@app.route('/admin/students/search')
+@login_required
+def search_students():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized'})
+
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 20)), 1), 100)
+        return jsonify(student_index.search(
+            request.args.get('q', ''), request.args.get('branch'), request.args.get('section'), page, per_page))
+    except ValueError as e:
+        return jsonify({'error': str(e)})
+
+@app.route('/admin/profiles')
+@login_required
+def admin_profiles():
+    if not current_user.is_admin:
+        return redirect(url_for('index'))
+
+    return render_template('profiles.html',
+                         enabled=profiler.PROFILING,
+                         profiles=profiler.list_profiles(),
+                         token=profiler.make_token(app, current_user.id),
+                         header=profiler.PROFILE_HEADER)
+
+@app.route('/admin/profiles/<name>.prof')
+@login_required
+def download_profile(name):
+    if not current_user.is_admin:
+        return redirect(url_for('index'))
+
+    return send_from_directory(os.path.abspath(profiler.PROFILE_DIR), name + '.prof', as_attachment=True)
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -410,6 +706,8 @@ def add_position():
         }
         
         result = mongo.db.positions.insert_one(position)
+        ballot_cache.invalidate()
+        dashboard_cache.invalidate()
         return jsonify({
             'success': True,
             'message': 'Position added successfully',
@@ -459,6 +757,8 @@ def add_candidate():
         }
         
         result = mongo.db.nominees.insert_one(candidate)
+        ballot_cache.invalidate()
+        dashboard_cache.invalidate()
         return jsonify({
             'success': True,
             'message': 'Candidate added successfully',
@@ -467,14 +767,47 @@ def add_candidate():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/admin/import_election', methods=['POST'])
+@login_required
+def import_election():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    try:
+        # Accept a JSON body or an uploaded JSON/YAML file
+        if 'file' in request.files:
+            upload = request.files['file']
+            definition = election_import.parse_definition(upload.read().decode('utf-8'), upload.filename or '')
+        else:
+            definition = election_import.parse_definition(request.get_data(as_text=True), request.args.get('format', ''))
+
+        replace = request.args.get('replace')
+        positions, candidates = election_import.apply_definition(
+            mongo.cx, mongo.db, definition,
+            replace=None if replace is None else replace == 'true',
+            upload_folder=app.config['UPLOAD_FOLDER'])
+        ballot_cache.warm()
+        dashboard_cache.invalidate()
+        return jsonify({
+            'success': True,
+            'message': f'Imported {positions} positions and {candidates} candidates',
+            'positions': positions,
+            'candidates': candidates
+        })
+    except election_import.ElectionDefinitionError as e:
+        return jsonify({'success': False, 'message': 'Invalid election definition', 'errors': e.errors})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 @app.route('/admin/export_voters')
 @login_required
 def export_voters():
     if not current_user.is_admin:
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
+    db = read_db()
     try:
-        voters = list(mongo.db.users.find())
+        voters = list(db.users.find())
         
         # Create CSV content
         csv_content = "Student ID,Name,Branch,Section,Voting Status,Voted At\n"
@@ -486,6 +819,7 @@ def export_voters():
         response = make_response(csv_content)
         response.headers['Content-Type'] = 'text/csv'
         response.headers['Content-Disposition'] = 'attachment; filename=voters_list.csv'
+        response.headers['Cache-Control'] = 'private, no-store'
         return response
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -500,6 +834,8 @@ def delete_position(position_id):
         # Delete position and associated nominees
         mongo.db.positions.delete_one({'_id': ObjectId(position_id)})
         mongo.db.nominees.delete_many({'position_id': position_id})
+        ballot_cache.invalidate()
+        dashboard_cache.invalidate()
         return jsonify({'success': True, 'message': 'Position deleted successfully'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -511,9 +847,14 @@ def delete_candidate(candidate_id):
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     try:
-        # Delete candidate and associated votes
+        # Delete candidate and associated votes, marking their voters for the consistency check
         mongo.db.nominees.delete_one({'_id': ObjectId(candidate_id)})
+        voters = mongo.db.votes.distinct('student_id', {'nominee_id': candidate_id})
         mongo.db.votes.delete_many({'nominee_id': candidate_id})
+        if voters:
+            mongo.db.users.update_many({'student_id': {'$in': voters}}, {'$set': {'touched_at': datetime.utcnow()}})
+        ballot_cache.invalidate()
+        dashboard_cache.invalidate()
         return jsonify({'success': True, 'message': 'Candidate deleted successfully'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -549,6 +890,10 @@ def add_student():
         }
         
         result = mongo.db.users.insert_one(student)
+        login_filter.add(student['student_id'], student['mobile'])
+        voter_roll.add(student['student_id'], student['branch'], student['section'])
+        student_index.add(student)
+        dashboard_cache.invalidate()
         return jsonify({
             'success': True,
             'message': 'Student added successfully',
@@ -564,23 +909,17 @@ def delete_student(student_id):
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     try:
-        # Get the student's votes before deleting
-        student_votes = list(mongo.db.votes.find({'student_id': student_id}))
-        
         # Delete the student
-        delete_result = mongo.db.users.delete_one({'student_id': student_id})
+        deleted = mongo.db.users.find_one_and_delete({'student_id': student_id}, {'mobile': 1})
         
-        if delete_result.deleted_count > 0:
+        if deleted:
+            login_filter.discard(student_id, deleted.get('mobile'))
+            voter_roll.remove(student_id)
+            student_index.remove(student_id)
+
             # Delete all votes associated with this student
             mongo.db.votes.delete_many({'student_id': student_id})
-            
-            # Update vote counts for affected candidates
-            for vote in student_votes:
-                # Update candidate vote count
-                mongo.db.nominees.update_one(
-                    {'_id': ObjectId(vote['nominee_id'])},
-                    {'$inc': {'votes': -1}}
-                )
+            dashboard_cache.invalidate()
             
             return jsonify({'success': True, 'message': 'Student and their votes deleted successfully'})
         else:
@@ -611,8 +950,10 @@ def delete_vote(vote_id):
         # Update user's voting status
         mongo.db.users.update_one(
             {'student_id': vote['student_id']},
-            {'$set': {'has_voted': False, 'voted_at': None}}
+            {'$set': {'has_voted': False, 'voted_at': None, 'touched_at': datetime.utcnow()}}
         )
+        voter_roll.mark_voted(vote['student_id'], False)
+        dashboard_cache.invalidate()
         
         return jsonify({'success': True, 'message': 'Vote deleted successfully'})
     except Exception as e:
@@ -626,7 +967,10 @@ def delete_all_votes():
     
     try:
         mongo.db.votes.delete_many({})
-        mongo.db.users.update_many({}, {'$set': {'has_voted': False}})
+        mongo.db.users.update_many({}, {'$set': {'has_voted': False, 'voted_at': None}})
+        receipt_tree.reset()
+        voter_roll.reset_votes()
+        dashboard_cache.invalidate()
         return jsonify({'success': True, 'message': 'All votes deleted successfully'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -667,6 +1011,7 @@ def set_voting_schedule():
             },
             upsert=True
         )
+        schedule_cache.invalidate()
         
         return jsonify({'success': True})
     except Exception as e:
@@ -699,19 +1044,15 @@ def get_voting_schedule():
 @login_required
 def get_voting_schedule_student():
     try:
-        schedule = mongo.db.voting_schedule.find_one({'_id': 'current_schedule'})
-        if schedule:
-            # Convert datetime objects to strings
-            return jsonify({
-                'success': True,
-                'schedule': {
-                    'start_date': schedule['start_date'].strftime('%Y-%m-%d') if isinstance(schedule['start_date'], datetime) else schedule['start_date'],
-                    'end_date': schedule['end_date'].strftime('%Y-%m-%d') if isinstance(schedule['end_date'], datetime) else schedule['end_date'],
-                    'start_time': schedule['start_time'].strftime('%H:%M') if isinstance(schedule['start_time'], datetime) else schedule['start_time'],
-                    'end_time': schedule['end_time'].strftime('%H:%M') if isinstance(schedule['end_time'], datetime) else schedule['end_time']
-                }
-            })
-        return jsonify({'success': True, 'schedule': None})
+        # The body only changes with the schedule, so its version alone answers revalidations
+        version = schedule_cache.current_version()
+        etag = http_cache.make_etag('schedule', version)
+        cached = http_cache.not_modified(etag)
+        if cached:
+            return cached
+        schedule = schedule_cache.get(version)
+        formatted = format_schedule(schedule) if schedule else None
+        return http_cache.set_validators(jsonify({'success': True, 'schedule': formatted}), etag)
     except Exception as e:
         print(f"Error in get_voting_schedule: {str(e)}")  # Add logging
         return jsonify({'success': False, 'message': str(e)})
@@ -720,36 +1061,26 @@ def get_voting_schedule_student():
 @login_required
 def check_voting_status():
     try:
-        if not is_voting_active():
-            schedule = mongo.db.voting_schedule.find_one({'_id': 'current_schedule'})
-            if schedule:
-                # Format the schedule dates and times
-                start_date = schedule['start_date'].strftime('%Y-%m-%d') if isinstance(schedule['start_date'], datetime) else schedule['start_date']
-                end_date = schedule['end_date'].strftime('%Y-%m-%d') if isinstance(schedule['end_date'], datetime) else schedule['end_date']
-                start_time = schedule['start_time'].strftime('%H:%M') if isinstance(schedule['start_time'], datetime) else schedule['start_time']
-                end_time = schedule['end_time'].strftime('%H:%M') if isinstance(schedule['end_time'], datetime) else schedule['end_time']
-                
-                return jsonify({
-                    'is_active': False,
-                    'message': f'Voting is not active. Voting period: {start_date} to {end_date}, {start_time} to {end_time}'
-                })
-            return jsonify({
-                'is_active': False,
-                'message': 'Voting schedule has not been set.'
-            })
-        return jsonify({'is_active': True})
+        # Tagged from the schedule version and whether voting is open now; the cached
+        # schedule is only re-read from Mongo when the version changed
+        version = schedule_cache.current_version()
+        schedule = schedule_cache.get(version)
+        etag = http_cache.make_etag('status', version, schedule_is_active(schedule))
+        cached = http_cache.not_modified(etag)
+        if cached:
+            return cached
+        return http_cache.set_validators(jsonify(voting_status(schedule)), etag)
     except Exception as e:
         print(f"Error in check_voting_status: {str(e)}")  # Add logging
         return jsonify({'is_active': False, 'message': str(e)})
 
-def is_voting_active():
-    """Check if voting is currently active based on schedule"""
+def schedule_is_active(schedule, now=None):
+    """Check if a stored schedule covers the given (default: current) UTC time"""
     try:
-        schedule = mongo.db.voting_schedule.find_one({'_id': 'current_schedule'})
         if not schedule:
             return False
         
-        now = datetime.utcnow()
+        now = now or datetime.utcnow()
         current_date = now.date()
         current_time = now.time()
         
@@ -782,7 +1113,7 @@ def is_voting_active():
             return True
         return False
     except Exception as e:
-        print(f"Error in is_voting_active: {str(e)}")  # Add logging
+        print(f"Error in schedule_is_active: {str(e)}")  # Add logging
         return False
 
 if __name__ == '__main__':
@@ -792,9 +1123,10 @@ if __name__ == '__main__':
         print("✅ MongoDB connection successful!")
         
         # Create indexes
-        mongo.db.users.create_index('student_id', unique=True)
-        mongo.db.users.create_index('mobile')
-        mongo.db.votes.create_index([('user_id', 1), ('nominee_id', 1)])
+        ensure_indexes(mongo.db)
+        # Waits for the background preload instead of building twice
+        for index in (login_filter, voter_roll, student_index):
+            index.ensure_current()
         
         # Start Flask app
         print("Starting Flask app...")
@@ -0,0 +1,217 @@
+"""Asyncio serving path for the hot polling and ballot endpoints.
+
+Serves /check_voting_status, /get_voting_schedule and /submit_vote on aiohttp
+with the Motor async Mongo driver, so a single process can keep thousands of
+requests waiting on Mongo instead of tying up one WSGI worker per request.
+Everything else stays on the Flask app; route these three paths to this
+process from the reverse proxy.
+
+It reads the same signed Flask session cookie (Flask-Login's _user_id and the
+Flask-WTF csrf_token), and shares validation with app.py, so login, CSRF and
+ballot rules are identical on both paths.
+
+Run with:
+    python async_app.py --port 8001
+"""
+import argparse
+import asyncio
+import hmac
+import json
+from datetime import datetime
+from urllib.parse import quote
+
+from aiohttp import web
+from bson.objectid import ObjectId
+from itsdangerous import BadData, URLSafeTimedSerializer
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
+
+import merkle
+from app import app as flask_app, User, validate_ballot, build_vote_documents, format_schedule, voting_status
+from vote4campus import idempotency
+
+session_serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+csrf_serializer = URLSafeTimedSerializer(flask_app.config['SECRET_KEY'], salt='wtf-csrf-token')
+
+
+def load_session(request):
+    """Decode the Flask session cookie, returning {} when missing or invalid"""
+    cookie = request.cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if not cookie:
+        return {}
+    try:
+        max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+        return session_serializer.loads(cookie, max_age=max_age)
+    except BadData:
+        return {}
+
+
+def csrf_valid(request, session):
+    """Mirror Flask-WTF's check of the X-CSRFToken header against the session token"""
+    token = request.headers.get('X-CSRFToken') or request.headers.get('X-CSRF-Token')
+    if not token or 'csrf_token' not in session:
+        return False
+    try:
+        data = csrf_serializer.loads(token, max_age=flask_app.config.get('WTF_CSRF_TIME_LIMIT', 3600))
+    except BadData:
+        return False
+    return hmac.compare_digest(session['csrf_token'], data)
+
+
+def login_required(handler):
+    """Resolve the logged-in user like Flask-Login, redirecting anonymous requests to /login"""
+    async def wrapper(request):
+        session = load_session(request)
+        user_id = session.get('_user_id')
+        user_data = None
+        if user_id and ObjectId.is_valid(user_id):
+            user_data = await request.app['db'].users.find_one({'_id': ObjectId(user_id)})
+        if not user_data:
+            raise web.HTTPFound(f'/login?next={quote(request.path)}')
+        request['session'] = session
+        request['user'] = User(user_data)
+        return await handler(request)
+    return wrapper
+
+
+@login_required
+async def get_voting_schedule(request):
+    try:
+        schedule = await request.app['db'].voting_schedule.find_one({'_id': 'current_schedule'})
+        if schedule:
+            return web.json_response({'success': True, 'schedule': format_schedule(schedule)})
+        return web.json_response({'success': True, 'schedule': None})
+    except Exception as e:
+        print(f"Error in get_voting_schedule: {str(e)}")
+        return web.json_response({'success': False, 'message': str(e)})
+
+
+@login_required
+async def check_voting_status(request):
+    try:
+        schedule = await request.app['db'].voting_schedule.find_one({'_id': 'current_schedule'})
+        return web.json_response(voting_status(schedule))
+    except Exception as e:
+        print(f"Error in check_voting_status: {str(e)}")
+        return web.json_response({'is_active': False, 'message': str(e)})
+
+
+@login_required
+async def submit_vote(request):
+    if not csrf_valid(request, request['session']):
+        return web.Response(status=400, text='The CSRF token is missing or invalid.')
+
+    key = request.headers.get(idempotency.IDEMPOTENCY_HEADER)
+    if not key:
+        return await record_ballot(request)
+
+    collection = request.app['db'].idempotency_keys
+    scoped = idempotency.scoped_key(request['user'].id, key)
+    claimed_at = idempotency.claim_time()
+    args, kwargs = idempotency.claim_args(scoped, claimed_at)
+    try:
+        await collection.find_one_and_update(*args, **kwargs)
+    except DuplicateKeyError:
+        body, status = idempotency.replay(await collection.find_one({'_id': scoped}))
+        return web.json_response(body, status=status)
+    except Exception as e:
+        print(f"Error claiming idempotency key: {str(e)}")
+        return await record_ballot(request)
+
+    response = None
+    try:
+        response = await record_ballot(request)
+        return response
+    finally:
+        data = json.loads(response.text) if response is not None else None
+        method, finish_args = idempotency.finish_args(scoped, claimed_at, data)
+        try:
+            await getattr(collection, method)(*finish_args)
+        except Exception as e:
+            # The ballot's own response stands; an unreleased claim lapses after CLAIM_LEASE
+            print(f"Error finishing idempotency key: {str(e)}")
+
+
+async def record_ballot(request):
+    db = request.app['db']
+    current_user = request['user']
+    try:
+        if current_user.is_admin:
+            return web.json_response({'success': False, 'message': 'Admins are not allowed to vote.'})
+
+        if current_user.has_voted:
+            return web.json_response({'success': False, 'message': 'You have already voted!'})
+
+        votes = await request.json()
+        if not votes:
+            return web.json_response({'success': False, 'message': 'No votes received.'})
+
+        all_positions = await db.positions.find().to_list(None)
+        nominees = await db.nominees.find(
+            {'_id': {'$in': [ObjectId(n) for n in votes.values()]}}).to_list(None)
+        error = validate_ballot(votes, all_positions, nominees)
+        if error:
+            return web.json_response({'success': False, 'message': error})
+
+        # The Merkle append is a short sequence of dependent writes; run it on the executor
+        loop = asyncio.get_running_loop()
+        tree = request.app['receipt_tree']
+        receipt, nonce = merkle.new_receipt(votes)
+        leaf_index = await loop.run_in_executor(None, tree.append, receipt)
+        try:
+            await db.votes.insert_many(build_vote_documents(current_user, votes, {
+                'receipt': receipt,
+                'receipt_nonce': nonce,
+                'leaf_index': leaf_index
+            }))
+        finally:
+            # Link the leaf even if the insert failed, or it would block every later proof
+            await loop.run_in_executor(None, tree.complete, leaf_index, receipt)
+        await db.users.update_one(
+            {'_id': ObjectId(current_user.id)},
+            {'$set': {'has_voted': True, 'voted_at': datetime.utcnow()}}
+        )
+
+        return web.json_response({
+            'success': True,
+            'message': 'Vote submitted successfully!',
+            'receipt': receipt,
+            'leaf_index': leaf_index,
+            'redirect': '/'
+        })
+    except Exception as e:
+        print(f"Error in submit_vote: {str(e)}")
+        return web.json_response({
+            'success': False,
+            'message': 'An error occurred while submitting your vote. Please try again.'
+        })
+
+
+async def open_mongo(app):
+    app['mongo'] = AsyncIOMotorClient(flask_app.config['MONGO_URI'], maxPoolSize=app['pool_size'])
+    app['db'] = app['mongo'].get_default_database()
+    sync_client = MongoClient(flask_app.config['MONGO_URI'])
+    app['receipt_tree'] = merkle.ReceiptTree(lambda: sync_client.get_default_database())
+    yield
+    app['mongo'].close()
+    sync_client.close()
+
+
+def create_app(pool_size=100):
+    app = web.Application()
+    app['pool_size'] = pool_size
+    app.cleanup_ctx.append(open_mongo)
+    app.router.add_get('/check_voting_status', check_voting_status)
+    app.router.add_get('/get_voting_schedule', get_voting_schedule)
+    app.router.add_post('/submit_vote', submit_vote)
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the hot voting endpoints on asyncio.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--pool-size', type=int, default=100, help='Motor connection pool size')
+    args = parser.parse_args()
+    web.run_app(create_app(args.pool_size), host=args.host, port=args.port)
@@ -0,0 +1,84 @@
+"""Per-worker cache of the ballot catalog (positions with their candidates).
+
+The catalog only changes when an admin edits positions/candidates or imports
+an election, so every such write bumps a version counter stored in
+meta.ballot_catalog. Readers compare that version (one tiny primary-key
+lookup) with the cached copy and only reload the catalog, with one query per
+collection, when it changed. The rendered ballot markup is cached the same
+way, so the position/candidate tree is only rendered once per version.
+"""
+import threading
+
+from pymongo import ReturnDocument
+
+CATALOG_ID = 'ballot_catalog'
+
+
+def bump_version(db, meta_id=CATALOG_ID):
+    """Record a catalog (or other meta-versioned) change; returns the new version"""
+    doc = db.meta.find_one_and_update(
+        {'_id': meta_id}, {'$inc': {'version': 1}}, upsert=True, return_document=ReturnDocument.AFTER)
+    return doc['version']
+
+
+def load_catalog(db):
+    """Positions (in insertion order) with their candidates, ids as strings"""
+    positions = list(db.positions.find())
+    by_id = {}
+    for position in positions:
+        position['_id'] = str(position['_id'])
+        position['candidates'] = []
+        by_id[position['_id']] = position
+    for candidate in db.nominees.find():
+        position = by_id.get(candidate.get('position_id'))
+        if position is not None:
+            candidate['_id'] = str(candidate['_id'])
+            position['candidates'].append(candidate)
+    return positions
+
+
+class BallotCache:
+    def __init__(self, get_db):
+        self.get_db = get_db
+        self.version = None
+        self.positions = None
+        self.fragment = None  # (version, rendered ballot)
+        self.lock = threading.Lock()
+
+    def current_version(self):
+        doc = self.get_db().meta.find_one({'_id': CATALOG_ID})
+        return doc.get('version', 0) if doc else 0
+
+    def get(self, version=None):
+        """The current catalog (or the given version's); treat the returned list as read-only"""
+        if version is None:
+            version = self.current_version()
+        if self.positions is not None and self.version == version:
+            return self.positions
+        positions = load_catalog(self.get_db())
+        with self.lock:
+            self.positions = positions
+            self.version = version
+        return positions
+
+    def rendered(self, render, version=None):
+        """render(positions) for the current catalog (or the given version), computed once per version"""
+        if version is None:
+            version = self.current_version()
+        fragment = self.fragment
+        if fragment is not None and fragment[0] == version:
+            return fragment[1]
+        output = render(self.get(version))
+        with self.lock:
+            self.fragment = (version, output)
+        return output
+
+    def invalidate(self):
+        """Bump the shared version after a catalog write so every worker reloads"""
+        bump_version(self.get_db())
+        with self.lock:
+            self.positions = None
+            self.fragment = None
+
+    def warm(self):
+        return self.get()
@@ -0,0 +1,123 @@
+"""Load test for admission control on /submit_vote.
+
+Submits ballots for fresh students (from generate_data.py) at increasing
+concurrency, past the point where the server saturates, and reports per
+level how many ballots were accepted, how many were shed with 503, and the
+latency percentiles of each. With admission control the p99 of admitted
+requests stays bounded as concurrency grows, and shed requests return fast
+instead of timing out. Pass --retry to follow Retry-After like voting.html
+does and see every ballot recorded eventually.
+
+Start the app with threaded workers first, for example:
+    gunicorn -k gthread -w 2 --threads 32 -b 127.0.0.1:8000 app:app
+
+Then run:
+    python bench_admission.py --levels 16,64,256,512 --requests 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+from itsdangerous import URLSafeTimedSerializer
+from pymongo import MongoClient
+
+from app import app as flask_app
+from bench_async import percentile
+
+load_dotenv()
+
+
+def make_voter_session(user):
+    """Signed session cookie and matching X-CSRFToken header for a student"""
+    raw = secrets.token_hex(20)
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    cookie = serializer.dumps({'_user_id': str(user['_id']), '_fresh': True, 'csrf_token': raw})
+    token = URLSafeTimedSerializer(flask_app.config['SECRET_KEY'], salt='wtf-csrf-token').dumps(raw)
+    return cookie, token
+
+
+def load_ballot(db):
+    """A valid ballot: the first candidate for every position"""
+    ballot = {}
+    for nominee in db.nominees.find({}, {'position_id': 1}):
+        ballot.setdefault(nominee['position_id'], str(nominee['_id']))
+    return ballot
+
+
+async def run(base_url, voters, ballot, concurrency, retry):
+    results = {'accepted': [], 'shed': [], 'failed': 0}
+    remaining = iter(voters)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    cookie_name = flask_app.config['SESSION_COOKIE_NAME']
+
+    async def submit(http, cookie, token):
+        headers = {'X-CSRFToken': token, 'Idempotency-Key': secrets.token_hex(8),
+                   'Cookie': f'{cookie_name}={cookie}'}
+        while True:
+            started = time.perf_counter()
+            async with http.post(base_url + '/submit_vote', json=ballot, headers=headers) as response:
+                await response.read()
+                elapsed = time.perf_counter() - started
+                if response.status != 503:
+                    if response.status == 200:
+                        results['accepted'].append(elapsed)
+                    else:
+                        results['failed'] += 1
+                    return
+                results['shed'].append(elapsed)
+                if not retry:
+                    return
+                retry_after = int(response.headers.get('Retry-After', 1))
+                await asyncio.sleep(retry_after * (0.5 + random.random()))
+
+    async def worker(http):
+        for user in remaining:
+            try:
+                await submit(http, *make_voter_session(user))
+            except aiohttp.ClientError:
+                results['failed'] += 1
+
+    async with aiohttp.ClientSession(connector=connector) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        results['elapsed'] = time.perf_counter() - started
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test admission control on /submit_vote.')
+    parser.add_argument('--uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/college_voting'))
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--levels', default='16,64,256,512', help='concurrency levels to run')
+    parser.add_argument('--requests', type=int, default=1000, help='ballots per level')
+    parser.add_argument('--retry', action='store_true', help='retry 503s after Retry-After, with jitter')
+    args = parser.parse_args()
+
+    db = MongoClient(args.uri).get_default_database('college_voting')
+    ballot = load_ballot(db)
+    levels = [int(level) for level in args.levels.split(',')]
+    voters = list(db.users.find({'has_voted': False, 'is_admin': {'$ne': True}}, {'_id': 1},
+                                limit=args.requests * len(levels)))
+    if len(voters) < args.requests * len(levels):
+        raise SystemExit(f'Need {args.requests * len(levels)} students who have not voted; run generate_data.py.')
+
+    print(f"{'conc':>6}{'accepted':>10}{'shed':>8}{'failed':>8}{'req/s':>9}"
+          f"{'ok p50':>9}{'ok p99':>9}{'503 p99':>9}")
+    for i, concurrency in enumerate(levels):
+        batch = voters[i * args.requests:(i + 1) * args.requests]
+        result = asyncio.run(run(args.url, batch, ballot, concurrency, args.retry))
+        accepted, shed = result['accepted'], result['shed']
+        ok_p50 = percentile(accepted, 50) * 1000 if accepted else 0
+        ok_p99 = percentile(accepted, 99) * 1000 if accepted else 0
+        shed_p99 = percentile(shed, 99) * 1000 if shed else 0
+        print(f"{concurrency:>6}{len(accepted):>10}{len(shed):>8}{result['failed']:>8}"
+              f"{len(accepted) / result['elapsed']:>9.1f}{ok_p50:>9.1f}{ok_p99:>9.1f}{shed_p99:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Compare the sync Flask routes with the asyncio serving path under concurrency.
+
+Mints a logged-in session cookie for an existing student (signed with the
+app's secret key), then fires concurrent GETs at the polling endpoints on
+both servers and reports throughput and latency percentiles.
+
+Start both servers first, for example:
+    gunicorn -w 4 -b 127.0.0.1:8000 app:app
+    python async_app.py --port 8001
+
+Then run:
+    python bench_async.py --student-id 2325000001 --requests 5000 --concurrency 500
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from app import app as flask_app
+
+load_dotenv()
+
+
+def make_session_cookie(uri, student_id):
+    db = MongoClient(uri).get_default_database('college_voting')
+    user = db.users.find_one({'student_id': student_id}, {'_id': 1})
+    if not user:
+        raise SystemExit(f'Student {student_id} not found; run generate_data.py first.')
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    return serializer.dumps({'_user_id': str(user['_id']), '_fresh': True})
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(base_url, path, cookie, total, concurrency):
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    cookies = {flask_app.config['SESSION_COOKIE_NAME']: cookie}
+
+    async def worker(http):
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                async with http.get(base_url + path, allow_redirects=False) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    async with aiohttp.ClientSession(connector=connector, cookies=cookies) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'rps': total / elapsed,
+        'p50': percentile(latencies, 50) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'errors': errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sync vs async polling endpoints.')
+    parser.add_argument('--uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/college_voting'))
+    parser.add_argument('--student-id', required=True)
+    parser.add_argument('--sync-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--async-url', default='http://127.0.0.1:8001')
+    parser.add_argument('--path', action='append',
+                        help='endpoint to benchmark (repeatable, default: both polling endpoints)')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    args = parser.parse_args()
+
+    cookie = make_session_cookie(args.uri, args.student_id)
+    paths = args.path or ['/check_voting_status', '/get_voting_schedule']
+
+    print(f"{'server':<8}{'path':<24}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for path in paths:
+        for name, base_url in (('sync', args.sync_url), ('async', args.async_url)):
+            result = asyncio.run(run(base_url, path, cookie, args.requests, args.concurrency))
+            print(f"{name:<8}{path:<24}{result['rps']:>10.1f}{result['p50']:>10.1f}"
+                  f"{result['p99']:>10.1f}{result['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Incremental consistency checker for users.has_voted/voted_at and votes.
+
+Each run only looks at students touched since the previous run, found from
+the previous run's time persisted in meta.consistency_watermark (less
+CLOCK_SKEW, since ObjectIds and voted_at come from app server clocks):
+  - users created since then (by ObjectId time)
+  - users whose voted_at or touched_at is newer; admin routes that remove
+    votes without casting one (delete_vote, delete_candidate) set touched_at
+  - students owning votes inserted since then (by ObjectId time)
+Those students are checked in batches with one $lookup aggregation per batch.
+Changes made directly in the database are only caught by --full runs.
+
+Reported problems (repaired with --repair where a safe fix exists):
+  voted_without_ballot  has_voted is set but the student has no votes (reset)
+  ballot_without_flag   votes exist but has_voted is not set (set from votes)
+  missing_voted_at      has_voted is set without voted_at (set from votes)
+  stale_voted_at        voted_at left behind after votes were deleted (cleared)
+  partial_ballot        fewer positions voted than on the ballot (report only)
+  duplicate_votes       more than one vote for a position (report only)
+  orphan_votes          votes whose student no longer exists (deleted)
+  nominee_vote_counter  stale nominees.votes counters nothing maintains (unset)
+
+Usage:
+    python consistency_check.py [--repair] [--full] [--batch-size 1000]
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+WATERMARK_ID = 'consistency_watermark'
+# _ids and timestamps come from app server clocks; re-check a window before the last run
+CLOCK_SKEW = timedelta(minutes=5)
+
+
+def changed_students(db, watermark):
+    """student_ids touched since the watermark's run (all students without one)"""
+    students = set()
+    users_query, votes_query = {}, {}
+    if watermark:
+        # ObjectIds are not monotonic across processes, so bound them by time, not by the last _id
+        since = watermark['run_at'] - CLOCK_SKEW
+        users_query = {'$or': [
+            {'_id': {'$gte': ObjectId.from_datetime(since)}},
+            {'voted_at': {'$gt': since}},
+            {'touched_at': {'$gt': since}}
+        ]}
+        votes_query = {'_id': {'$gte': ObjectId.from_datetime(since)}}
+
+    for user in db.users.find(users_query, {'_id': 0, 'student_id': 1}):
+        students.add(user['student_id'])
+    for row in db.votes.aggregate([{'$match': votes_query}, {'$group': {'_id': '$student_id'}}]):
+        students.add(row['_id'])
+    return students
+
+
+def check_batch(db, student_ids, position_count):
+    """Check one batch of students; returns a list of (problem, student_id, detail)"""
+    problems = []
+    pipeline = [
+        {'$match': {'student_id': {'$in': student_ids}, 'is_admin': {'$ne': True}}},
+        {'$lookup': {
+            'from': 'votes',
+            'let': {'sid': '$student_id'},
+            'pipeline': [
+                {'$match': {'$expr': {'$eq': ['$student_id', '$$sid']}}},
+                {'$group': {
+                    '_id': None,
+                    'count': {'$sum': 1},
+                    'positions': {'$addToSet': '$position_id'},
+                    'last_vote': {'$max': '$timestamp'}
+                }}
+            ],
+            'as': 'ballot'
+        }},
+        {'$project': {'student_id': 1, 'has_voted': 1, 'voted_at': 1, 'ballot': {'$arrayElemAt': ['$ballot', 0]}}}
+    ]
+    seen = set()
+    for user in db.users.aggregate(pipeline):
+        seen.add(user['student_id'])
+        ballot = user.get('ballot') or {'count': 0, 'positions': [], 'last_vote': None}
+        sid = user['student_id']
+        has_voted = user.get('has_voted', False)
+
+        if has_voted and not ballot['count']:
+            problems.append(('voted_without_ballot', sid, None))
+        elif not has_voted and ballot['count']:
+            problems.append(('ballot_without_flag', sid, ballot['last_vote']))
+        elif has_voted and not user.get('voted_at'):
+            problems.append(('missing_voted_at', sid, ballot['last_vote']))
+        elif not has_voted and user.get('voted_at'):
+            problems.append(('stale_voted_at', sid, None))
+
+        if ballot['count']:
+            if ballot['count'] > len(ballot['positions']):
+                problems.append(('duplicate_votes', sid, ballot['count']))
+            if len(ballot['positions']) < position_count:
+                problems.append(('partial_ballot', sid, len(ballot['positions'])))
+
+    # Admins are excluded above, so only look for truly missing students
+    missing = [sid for sid in student_ids if sid not in seen]
+    if missing:
+        present = {u['student_id'] for u in db.users.find({'student_id': {'$in': missing}}, {'student_id': 1})}
+        for sid in missing:
+            if sid not in present:
+                problems.append(('orphan_votes', sid, None))
+    return problems
+
+
+def repair(db, problem, student_id, detail):
+    """Apply the safe fix for a problem; returns True when something was changed"""
+    if problem == 'voted_without_ballot':
+        db.users.update_one({'student_id': student_id}, {'$set': {'has_voted': False, 'voted_at': None}})
+    elif problem in ('ballot_without_flag', 'missing_voted_at'):
+        db.users.update_one({'student_id': student_id},
+                            {'$set': {'has_voted': True, 'voted_at': detail or datetime.utcnow()}})
+    elif problem == 'stale_voted_at':
+        db.users.update_one({'student_id': student_id}, {'$set': {'voted_at': None}})
+    elif problem == 'orphan_votes':
+        db.votes.delete_many({'student_id': student_id})
+    else:
+        return False
+    return True
+
+
+def run(db, repair_problems=False, full=False, batch_size=1000):
+    started = time.time()
+    run_at = datetime.utcnow()
+    watermark = None if full else db.meta.find_one({'_id': WATERMARK_ID})
+    students = changed_students(db, watermark)
+    position_count = db.positions.count_documents({})
+
+    report = {'checked': len(students), 'full': watermark is None, 'problems': {}, 'repaired': 0}
+    student_ids = sorted(students)
+    for i in range(0, len(student_ids), batch_size):
+        for problem, sid, detail in check_batch(db, student_ids[i:i + batch_size], position_count):
+            report['problems'].setdefault(problem, []).append(sid)
+            if repair_problems and repair(db, problem, sid, detail):
+                report['repaired'] += 1
+
+    stale_counters = db.nominees.count_documents({'votes': {'$exists': True}})
+    if stale_counters:
+        report['problems']['nominee_vote_counter'] = stale_counters
+        if repair_problems:
+            db.nominees.update_many({'votes': {'$exists': True}}, {'$unset': {'votes': ''}})
+            report['repaired'] += stale_counters
+
+    db.meta.replace_one({'_id': WATERMARK_ID}, {'run_at': run_at}, upsert=True)
+    report['seconds'] = round(time.time() - started, 2)
+    return report
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Check has_voted/voted_at against the votes collection.')
+    parser.add_argument('--uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/college_voting'))
+    parser.add_argument('--repair', action='store_true', help='fix problems that have a safe repair')
+    parser.add_argument('--full', action='store_true', help='ignore the watermark and check every student')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    try:
+        db = MongoClient(args.uri).get_default_database('college_voting')
+        report = run(db, args.repair, args.full, args.batch_size)
+        print(f"Checked {report['checked']} students ({'full' if report['full'] else 'incremental'} run) "
+              f"in {report['seconds']}s.")
+        if not report['problems']:
+            print("No problems found.")
+        for problem, found in report['problems'].items():
+            if isinstance(found, int):
+                print(f"  {problem}: {found}")
+            else:
+                print(f"  {problem}: {len(found)} (e.g. {', '.join(found[:5])})")
+        if args.repair:
+            print(f"Repaired {report['repaired']} problems.")
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,219 @@
+"""Single-flight, stale-while-revalidate cache for the admin dashboard data.
+
+The dashboard runs a dozen aggregate queries over users and votes. During
+counting many admins and observers keep it open, so instead of running those
+queries per request every worker keeps the last computed snapshot:
+
+  - a snapshot younger than `max_age` seconds is served as is
+  - an older one is still served, while one background thread refreshes it
+  - only a worker with no snapshot at all (or one invalidated by its own
+    admin write) computes in the request, and concurrent requests wait for
+    that single computation instead of starting their own
+
+Workers share snapshots through Mongo: the last computed one is stored
+zlib-compressed in the dashboard_snapshots collection, described by
+meta.dashboard_snapshot. A worker refreshing a stale snapshot first loads the
+shared one if it is newer; only when that is stale too does it compute, and
+only while holding the lease in meta.dashboard_lease, so at most one worker
+recomputes at a time and the others pick up its result.
+
+Admin writes call invalidate(), which drops this worker's snapshot and bumps
+an invalidation counter on the shared one. A computation that started before
+an invalidation is discarded rather than cached or stored, and workers never
+load a shared snapshot computed before the latest invalidation.
+"""
+import os
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta
+
+import bson
+from pymongo.errors import DuplicateKeyError
+
+LEASE_ID = 'dashboard_lease'
+SNAPSHOT_ID = 'dashboard_snapshot'
+CHUNK_SIZE = 4 * 1024 * 1024  # stays under Mongo's 16 MB document limit
+
+
+def to_bson(value):
+    """BSON-safe copy of the data; dicts keyed by non-strings (e.g. a None branch) become item lists"""
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: to_bson(item) for key, item in value.items()}
+        return {'__items__': [[key, to_bson(item)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [to_bson(item) for item in value]
+    return value
+
+
+def from_bson(value):
+    if isinstance(value, dict):
+        if '__items__' in value:
+            return {key: from_bson(item) for key, item in value['__items__']}
+        return {key: from_bson(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [from_bson(item) for item in value]
+    return value
+
+
+class DashboardCache:
+    def __init__(self, get_db, compute, max_age=10, lease_seconds=60):
+        self.get_db = get_db
+        self.compute = compute
+        self.max_age = max_age
+        self.lease_seconds = lease_seconds
+        self.holder = f'{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.data = None
+        self.computed_at = 0
+        self.generation = 0  # bumped by invalidate(); results computed under an older one are dropped
+        self.refreshing = False
+        self.lock = threading.Lock()
+        self.compute_lock = threading.Lock()
+
+    def age(self):
+        return time.monotonic() - self.computed_at
+
+    def get(self):
+        """The dashboard data; treat the returned dict as read-only"""
+        data = self.data
+        if data is None:
+            return self._compute_once()
+        if self.age() > self.max_age:
+            self._refresh_in_background()
+        return data
+
+    def invalidate(self):
+        """Drop this worker's snapshot, and the shared one, after an admin write"""
+        # Shared first, so this worker cannot reload the old shared snapshot in between
+        try:
+            self.get_db().meta.update_one({'_id': SNAPSHOT_ID}, {'$inc': {'invalidations': 1}}, upsert=True)
+        except Exception as e:
+            # Other workers fall back to their max_age refresh
+            print(f"Error invalidating shared dashboard snapshot: {str(e)}")
+        with self.lock:
+            self.generation += 1
+            self.data = None
+
+    def _keep(self, generation, data, computed_at):
+        """Cache data unless an invalidation happened since it was read; returns whether it was kept"""
+        with self.lock:
+            if generation != self.generation:
+                return False
+            self.data = data
+            self.computed_at = time.monotonic() - (datetime.utcnow() - computed_at).total_seconds()
+            return True
+
+    def _compute_once(self):
+        with self.compute_lock:
+            # Requests that queued behind the computation reuse its result
+            if self.data is not None:
+                return self.data
+            generation = self.generation
+            shared = self.load_shared()
+            if shared is not None and self._keep(generation, *shared):
+                if self.age() > self.max_age:
+                    self._refresh_in_background()
+                return self.data
+            return self._compute(generation)
+
+    def _compute(self, generation):
+        invalidations = self.shared_invalidations()
+        computed_at = datetime.utcnow()
+        data = self.compute()
+        if self._keep(generation, data, computed_at):
+            self.store_shared(data, computed_at, invalidations)
+        return data
+
+    def _refresh_in_background(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self):
+        try:
+            generation = self.generation
+            shared = self.load_shared(newer_than=self.age())
+            if shared is not None:
+                self._keep(generation, *shared)
+                if self.age() <= self.max_age:
+                    return
+            if not self.acquire_lease():
+                # Another worker is computing; a later request loads its result
+                return
+            try:
+                self._compute(generation)
+            finally:
+                self.release_lease()
+        except Exception as e:
+            # Keep serving the previous snapshot; the next stale read retries
+            print(f"Error refreshing dashboard: {str(e)}")
+        finally:
+            self.refreshing = False
+
+    # Shared snapshot
+
+    def shared_invalidations(self):
+        meta = self.get_db().meta.find_one({'_id': SNAPSHOT_ID}, {'invalidations': 1}) or {}
+        return meta.get('invalidations', 0)
+
+    def load_shared(self, newer_than=None):
+        """(data, computed_at) of the shared snapshot, if it is current and newer than `newer_than` seconds"""
+        db = self.get_db()
+        meta = db.meta.find_one({'_id': SNAPSHOT_ID})
+        if not meta or meta.get('key') is None or meta.get('based_on') != meta.get('invalidations', 0):
+            return None
+        if newer_than is not None and (datetime.utcnow() - meta['computed_at']).total_seconds() >= newer_than:
+            return None
+        chunks = list(db.dashboard_snapshots.find({'snapshot': meta['key']}, {'_id': 0, 'data': 1}, sort=[('n', 1)]))
+        if len(chunks) != meta['chunks']:
+            # Replaced while we were reading it
+            return None
+        encoded = zlib.decompress(b''.join(chunk['data'] for chunk in chunks))
+        return from_bson(bson.decode(encoded)['data']), meta['computed_at']
+
+    def store_shared(self, data, computed_at, invalidations):
+        """Publish a snapshot computed after `invalidations` invalidations, unless another has happened since"""
+        try:
+            db = self.get_db()
+            key = uuid.uuid4().hex
+            encoded = zlib.compress(bson.encode({'data': to_bson(data)}))
+            chunks = [encoded[i:i + CHUNK_SIZE] for i in range(0, len(encoded), CHUNK_SIZE)]
+            db.dashboard_snapshots.insert_many(
+                [{'snapshot': key, 'n': n, 'data': bson.Binary(chunk)} for n, chunk in enumerate(chunks)])
+            try:
+                previous = db.meta.find_one_and_update(
+                    {'_id': SNAPSHOT_ID, 'invalidations': invalidations},
+                    {'$set': {'based_on': invalidations, 'computed_at': computed_at, 'key': key,
+                              'chunks': len(chunks)}},
+                    upsert=True)
+            except DuplicateKeyError:
+                # Invalidated while computing
+                db.dashboard_snapshots.delete_many({'snapshot': key})
+                return
+            if previous and previous.get('key'):
+                db.dashboard_snapshots.delete_many({'snapshot': previous['key']})
+        except Exception as e:
+            # This worker still serves its own copy
+            print(f"Error storing shared dashboard snapshot: {str(e)}")
+
+    # Lease
+
+    def acquire_lease(self):
+        now = datetime.utcnow()
+        try:
+            self.get_db().meta.find_one_and_update(
+                {'_id': LEASE_ID, '$or': [{'expires_at': {'$lt': now}}, {'holder': self.holder}]},
+                {'$set': {'holder': self.holder, 'expires_at': now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True)
+            return True
+        except DuplicateKeyError:
+            # Another worker holds an unexpired lease
+            return False
+
+    def release_lease(self):
+        self.get_db().meta.update_one(
+            {'_id': LEASE_ID, 'holder': self.holder}, {'$set': {'expires_at': datetime.utcnow()}})
@@ -0,0 +1,207 @@
+"""Declarative election definition import.
+
+Loads a whole ballot (positions, candidates, descriptions, image references)
+from JSON or YAML, validates it entirely in memory and writes it with one
+insert_many per collection inside a single transaction, then bumps the ballot
+catalog version so every worker reloads the new ballot.
+
+Definition format (YAML shown, JSON is equivalent):
+
+    replace: false            # true removes existing positions/candidates first
+    positions:
+      - title: President
+        description: Leads the student council
+        candidates:
+          - name: Alice
+            branch: CSE
+            section: A
+            description: Third year, CSE
+            image_url: https://example.com/alice.jpg   # or image: alice.jpg in static/uploads
+
+Command line:
+    python election_import.py election.yaml [--replace] [--dry-run]
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
+
+from ballot_cache import bump_version
+
+POSITION_FIELDS = {'title', 'description', 'candidates'}
+CANDIDATE_FIELDS = {'name', 'branch', 'section', 'description', 'image_url', 'image'}
+CANDIDATE_REQUIRED = ['name', 'branch', 'section']
+
+
+class ElectionDefinitionError(ValueError):
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def parse_definition(text, filename=''):
+    """Parse JSON, falling back to YAML (PyYAML) for .yaml/.yml files or non-JSON text"""
+    if not filename.endswith(('.yaml', '.yml')):
+        try:
+            return json.loads(text)
+        except ValueError:
+            if filename.endswith('.json'):
+                raise ElectionDefinitionError(['Definition is not valid JSON'])
+    try:
+        import yaml
+    except ImportError:
+        raise ElectionDefinitionError(['YAML definitions require PyYAML (pip install pyyaml)'])
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ElectionDefinitionError([f'Definition is not valid YAML: {e}'])
+
+
+def build_documents(definition, existing_titles=(), upload_folder='static/uploads'):
+    """Validate a definition and build position/nominee documents with pre-assigned ids.
+
+    Raises ElectionDefinitionError listing every problem found.
+    """
+    errors = []
+    if not isinstance(definition, dict) or not isinstance(definition.get('positions'), list):
+        raise ElectionDefinitionError(['Definition must be an object with a "positions" list'])
+    if not definition['positions']:
+        raise ElectionDefinitionError(['Definition has no positions'])
+
+    existing = {t.strip().lower() for t in existing_titles}
+    seen = set()
+    now = datetime.utcnow()
+    positions, nominees = [], []
+
+    for i, item in enumerate(definition['positions'], 1):
+        where = f'positions[{i}]'
+        if not isinstance(item, dict):
+            errors.append(f'{where} must be an object')
+            continue
+        unknown = set(item) - POSITION_FIELDS
+        if unknown:
+            errors.append(f'{where} has unknown fields: {", ".join(sorted(unknown))}')
+        title = str(item.get('title') or '').strip()
+        if not title:
+            errors.append(f'{where}.title is required')
+        elif title.lower() in seen:
+            errors.append(f'{where}.title "{title}" is duplicated in the definition')
+        elif title.lower() in existing:
+            errors.append(f'{where}.title "{title}" already exists')
+        seen.add(title.lower())
+
+        position = {
+            '_id': ObjectId(),
+            'title': title,
+            'description': str(item.get('description') or ''),
+            'created_at': now
+        }
+        positions.append(position)
+
+        candidates = item.get('candidates') or []
+        if not isinstance(candidates, list) or not candidates:
+            errors.append(f'{where}.candidates must be a non-empty list')
+            continue
+        names = set()
+        for j, candidate in enumerate(candidates, 1):
+            cwhere = f'{where}.candidates[{j}]'
+            if not isinstance(candidate, dict):
+                errors.append(f'{cwhere} must be an object')
+                continue
+            unknown = set(candidate) - CANDIDATE_FIELDS
+            if unknown:
+                errors.append(f'{cwhere} has unknown fields: {", ".join(sorted(unknown))}')
+            for field in CANDIDATE_REQUIRED:
+                if not str(candidate.get(field) or '').strip():
+                    errors.append(f'{cwhere}.{field} is required')
+            name = str(candidate.get('name') or '').strip()
+            if name and name.lower() in names:
+                errors.append(f'{cwhere}.name "{name}" is duplicated for {title}')
+            names.add(name.lower())
+
+            image_url = candidate.get('image_url') or None
+            if candidate.get('image'):
+                image = os.path.basename(str(candidate['image']))
+                if not os.path.isfile(os.path.join(upload_folder, image)):
+                    errors.append(f'{cwhere}.image "{image}" was not found in {upload_folder}')
+                image_url = f'/static/uploads/{image}'
+
+            nominees.append({
+                '_id': ObjectId(),
+                'position_id': str(position['_id']),
+                'name': name,
+                'branch': str(candidate.get('branch') or '').strip(),
+                'section': str(candidate.get('section') or '').strip(),
+                'description': str(candidate.get('description') or ''),
+                'image_url': image_url,
+                'created_at': now
+            })
+
+    if errors:
+        raise ElectionDefinitionError(errors)
+    return positions, nominees
+
+
+def apply_definition(client, db, definition, replace=None, upload_folder='static/uploads'):
+    """Validate and write a definition; returns (positions, nominees) counts"""
+    if replace is None:
+        replace = bool(definition.get('replace')) if isinstance(definition, dict) else False
+    if replace and db.votes.count_documents({}, limit=1):
+        raise ElectionDefinitionError(['Cannot replace the ballot while votes exist; delete all votes first'])
+
+    existing_titles = [] if replace else [p['title'] for p in db.positions.find({}, {'title': 1}) if p.get('title')]
+    positions, nominees = build_documents(definition, existing_titles, upload_folder)
+
+    def write(session=None):
+        if replace:
+            db.positions.delete_many({}, session=session)
+            db.nominees.delete_many({}, session=session)
+        db.positions.insert_many(positions, session=session)
+        db.nominees.insert_many(nominees, session=session)
+
+    try:
+        with client.start_session() as session:
+            session.with_transaction(write)
+    except OperationFailure as e:
+        # Standalone servers (like a default local mongod) do not support transactions
+        if e.code not in (20, 263):
+            raise
+        print("Transactions are not supported by this server; importing without one.")
+        write()
+
+    bump_version(db)
+    return len(positions), len(nominees)
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Import an election definition (JSON or YAML).')
+    parser.add_argument('path')
+    parser.add_argument('--uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/college_voting'))
+    parser.add_argument('--replace', action='store_true', default=None,
+                        help='remove existing positions and candidates first')
+    parser.add_argument('--dry-run', action='store_true', help='validate only')
+    args = parser.parse_args()
+
+    try:
+        with open(args.path) as f:
+            definition = parse_definition(f.read(), args.path)
+        if args.dry_run:
+            positions, nominees = build_documents(definition)
+            print(f"Definition is valid: {len(positions)} positions, {len(nominees)} candidates.")
+        else:
+            client = MongoClient(args.uri)
+            counts = apply_definition(client, client.get_default_database('college_voting'), definition, args.replace)
+            print(f"Imported {counts[0]} positions and {counts[1]} candidates.")
+    except ElectionDefinitionError as e:
+        print("Invalid election definition:")
+        for error in e.errors:
+            print(f"  - {error}")
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,183 @@
+"""Generate a synthetic, production-sized election dataset.
+
+Creates N students spread over the given branches/sections, P positions with
+C candidates each and, optionally, a skewed vote distribution with timestamps.
+Everything is written with batched insert_many calls and a fixed seed so the
+same command always produces the same data.
+
+Example:
+    python generate_data.py --students 100000 --positions 10 --candidates 4 --turnout 0.8 --drop
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from ballot_cache import bump_version
+
+load_dotenv()
+
+FIRST_NAMES = ['Aarav', 'Aditi', 'Arjun', 'Divya', 'Harsha', 'Kavya', 'Kiran', 'Lakshmi',
+               'Meera', 'Nikhil', 'Nithya', 'Pooja', 'Rahul', 'Ravi', 'Sai', 'Sneha',
+               'Srinivas', 'Swathi', 'Teja', 'Varun']
+LAST_NAMES = ['Reddy', 'Rao', 'Kumar', 'Sharma', 'Naidu', 'Varma', 'Chowdary', 'Gupta',
+              'Iyer', 'Patel']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate synthetic election data for benchmarking.')
+    parser.add_argument('--uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/college_voting'))
+    parser.add_argument('--students', type=int, default=1000, help='number of students to create')
+    parser.add_argument('--branches', default='CSE,ECE,EEE,MECH,CIVIL,IT', help='comma separated branch names')
+    parser.add_argument('--sections', default='A,B,C', help='comma separated section names')
+    parser.add_argument('--positions', type=int, default=2, help='number of positions on the ballot')
+    parser.add_argument('--candidates', type=int, default=3, help='candidates per position')
+    parser.add_argument('--turnout', type=float, default=0.0,
+                        help='fraction of students who vote (0 disables vote generation)')
+    parser.add_argument('--skew', type=float, default=1.2,
+                        help='Zipf exponent for the candidate preference distribution')
+    parser.add_argument('--hours', type=float, default=8.0, help='length of the simulated voting window')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--drop', action='store_true',
+                        help='remove existing students, positions, nominees and votes first')
+    return parser.parse_args()
+
+
+def insert_batched(collection, docs, batch_size):
+    """Insert an iterable of documents in unordered batches, returning the count."""
+    batch = []
+    total = 0
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            total += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        total += len(batch)
+    return total
+
+
+def build_ballot(rng, num_positions, num_candidates, branches, sections):
+    positions = []
+    nominees = []
+    now = datetime.utcnow()
+    for p in range(num_positions):
+        position = {
+            '_id': ObjectId(),
+            'title': f'Position {p + 1}',
+            'description': f'Synthetic position {p + 1}',
+            'created_at': now
+        }
+        positions.append(position)
+        for c in range(num_candidates):
+            nominees.append({
+                '_id': ObjectId(),
+                'position_id': str(position['_id']),
+                'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                'branch': rng.choice(branches),
+                'section': rng.choice(sections),
+                'description': f'Candidate {c + 1} for {position["title"]}',
+                'image_url': None,
+                'created_at': now
+            })
+    return positions, nominees
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    branches = [b.strip() for b in args.branches.split(',') if b.strip()]
+    sections = [s.strip() for s in args.sections.split(',') if s.strip()]
+
+    client = MongoClient(args.uri)
+    db = client.get_default_database('college_voting')
+
+    if args.drop:
+        db.users.delete_many({'is_admin': {'$ne': True}})
+        db.positions.delete_many({})
+        db.nominees.delete_many({})
+        db.votes.delete_many({})
+        print('Existing election data removed.')
+
+    positions, nominees = build_ballot(rng, args.positions, args.candidates, branches, sections)
+    if positions:
+        db.positions.insert_many(positions)
+    if nominees:
+        db.nominees.insert_many(nominees)
+    bump_version(db)  # running workers reload the cached ballot
+    print(f'Inserted {len(positions)} positions and {len(nominees)} candidates.')
+
+    # Per-position candidate list and Zipf-like weights so a few candidates dominate
+    ballot = []
+    for position in positions:
+        candidates = [str(n['_id']) for n in nominees if n['position_id'] == str(position['_id'])]
+        rng.shuffle(candidates)
+        weights = [1.0 / ((rank + 1) ** args.skew) for rank in range(len(candidates))]
+        ballot.append((str(position['_id']), candidates, weights))
+
+    window_start = datetime.utcnow() - timedelta(hours=args.hours)
+    window_seconds = args.hours * 3600
+    voters = []
+
+    def students():
+        for i in range(args.students):
+            branch = branches[i % len(branches)]
+            section = sections[(i // len(branches)) % len(sections)]
+            has_voted = rng.random() < args.turnout
+            student = {
+                '_id': ObjectId(),
+                'student_id': f'2325{i:06d}',
+                'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                'mobile': f'{rng.choice("6789")}{i:09d}',
+                'branch': branch,
+                'section': section,
+                'has_voted': has_voted,
+                'is_admin': False,
+                'created_at': window_start
+            }
+            if has_voted:
+                # Turnout is front-loaded: most ballots arrive early in the window
+                student['voted_at'] = window_start + timedelta(
+                    seconds=min(rng.expovariate(3.0 / window_seconds), window_seconds))
+                voters.append(student)
+            yield student
+
+    started = time.time()
+    count = insert_batched(db.users, students(), args.batch_size)
+    print(f'Inserted {count} students in {time.time() - started:.1f}s ({len(voters)} voters).')
+
+    if not voters or not ballot:
+        return
+
+    def votes():
+        for student in voters:
+            for position_id, candidates, weights in ballot:
+                if not candidates:
+                    continue
+                yield {
+                    'user_id': str(student['_id']),
+                    'student_id': student['student_id'],
+                    'position_id': position_id,
+                    'nominee_id': rng.choices(candidates, weights)[0],
+                    'timestamp': student['voted_at'],
+                    'branch': student['branch'],
+                    'section': student['section']
+                }
+
+    started = time.time()
+    count = insert_batched(db.votes, votes(), args.batch_size)
+    print(f'Inserted {count} votes in {time.time() - started:.1f}s.')
+
+
+if __name__ == '__main__':
+    try:
+        generate(parse_args())
+    except Exception as e:
+        print(f'Error: {e}')
@@ -0,0 +1,97 @@
+"""HTTP conditional caching and response compression.
+
+Routes that can tell cheaply whether a client's copy is still current send a
+strong ETag with `Cache-Control: private, no-cache`, so browsers revalidate
+on every use and get an empty 304 when nothing changed:
+
+  - the ballot page is tagged from the catalog version and the session, and
+    is checked before any template work
+  - the schedule polling endpoints are tagged from the schedule version (and
+    whether voting is open now), and are checked before any JSON is built
+
+init_app() installs an after_request hook that gzip-compresses (or brotli,
+when the optional `brotli` package is installed and the client accepts it)
+HTML, JSON and CSV responses of at least COMPRESS_MIN_SIZE bytes, with
+`Vary: Accept-Encoding`. Each encoding gets its own strong ETag ("<tag>-gzip")
+as RFC 9110 requires; If-None-Match accepts any of them.
+"""
+import gzip
+import hashlib
+import os
+
+from flask import make_response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+COMPRESSIBLE_TYPES = {'text/html', 'text/csv', 'text/plain', 'application/json', 'application/javascript', 'text/css'}
+REVALIDATE = 'private, no-cache'
+
+
+def make_etag(*parts):
+    return hashlib.sha256('\0'.join(str(p) for p in parts).encode()).hexdigest()[:32]
+
+
+def matching_tag(etag):
+    """The client's If-None-Match tag naming this entity in any encoding, or None"""
+    tags = request.if_none_match
+    if not tags:
+        return None
+    if tags.star_tag:
+        return etag
+    for tag in tags.as_set(include_weak=True):
+        if tag.split('-', 1)[0] == etag:
+            return tag
+    return None
+
+
+def set_validators(response, etag, cache_control=REVALIDATE):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    # Tags depend on the session, and bodies on the negotiated encoding
+    response.vary.update(('Cookie', 'Accept-Encoding'))
+    return response
+
+
+def not_modified(etag, cache_control=REVALIDATE):
+    """A 304 for `etag` if the client already has it, else None"""
+    tag = matching_tag(etag)
+    if tag is None:
+        return None
+    return set_validators(make_response('', 304), tag, cache_control)
+
+
+def compress(response):
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        encoding = 'br'
+    elif accepted['gzip']:
+        encoding = 'gzip'
+    else:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=COMPRESS_LEVEL))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+def init_app(app):
+    app.after_request(compress)
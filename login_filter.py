@@ -0,0 +1,107 @@
+"""In-memory negative-lookup filter for login credentials.
+
+Holds a compact 64-bit digest of every (student_id, mobile) pair so the login
+route can reject credentials that definitely do not exist without a Mongo
+round trip. A hit is only "probably valid" and is still confirmed with the
+indexed users lookup.
+
+Each worker keeps its own copy, built and resynced as described in
+resync_index: writes made through this worker update it immediately, and a
+full rebuild every `resync_interval` seconds picks up everything done
+elsewhere, including deletions. In between, students created by other
+workers, bulk imports and the data scripts are picked up by an incremental
+read of recently created _ids at most every `refresh_interval` seconds.
+That read trusts the writers' clocks, so students whose _id predates it
+(a writer clock more than CLOCK_SKEW behind, a restore that keeps _ids) are
+only found by the next full rebuild.
+"""
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+
+from resync_index import ResyncingIndex
+
+# ObjectIds come from client clocks, so re-read a window before the last refresh
+CLOCK_SKEW = timedelta(seconds=60)
+
+
+def credential_digest(student_id, mobile):
+    digest = hashlib.blake2b(f'{student_id}\0{mobile}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class LoginFilter(ResyncingIndex):
+    name = 'login filter'
+
+    def __init__(self, get_users, refresh_interval=30, resync_interval=300):
+        super().__init__(get_users, resync_interval)
+        self.refresh_interval = refresh_interval
+        self.digests = set()
+        self.loaded_at = None
+        self.checked_at = 0
+        self.refreshing = False
+
+    def _after_fork(self):
+        super()._after_fork()
+        self.refreshing = False
+
+    def load(self):
+        index = LoginFilter(self.get_users)
+        index.loaded_at = datetime.now(timezone.utc)
+        cursor = self.get_users().find({}, {'_id': 0, 'student_id': 1, 'mobile': 1})
+        index.digests = {credential_digest(u.get('student_id'), u.get('mobile')) for u in cursor}
+        return index
+
+    def adopt(self, index):
+        self.digests, self.loaded_at = index.digests, index.loaded_at
+        self.checked_at = time.monotonic()
+
+    def describe(self):
+        return f"Login filter built with {len(self.digests)} entries"
+
+    def refresh(self):
+        """Pick up students created since the last load (by any process)"""
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        try:
+            self.checked_at = time.monotonic()  # keep concurrent requests from refreshing too
+            since = ObjectId.from_datetime(self.loaded_at - CLOCK_SKEW)
+            loaded_at = datetime.now(timezone.utc)
+            cursor = self.get_users().find({'_id': {'$gte': since}}, {'_id': 0, 'student_id': 1, 'mobile': 1})
+            digests = [credential_digest(u.get('student_id'), u.get('mobile')) for u in cursor]
+            with self.lock:
+                self.digests.update(digests)
+                self.loaded_at = max(self.loaded_at, loaded_at)
+                self.checked_at = time.monotonic()
+        finally:
+            self.refreshing = False
+
+    def might_contain(self, student_id, mobile):
+        """False means the pair definitely does not exist; True needs a DB confirmation"""
+        try:
+            self.ensure_current()
+            if time.monotonic() - self.checked_at > self.refresh_interval:
+                self.refresh()
+        except Exception as e:
+            # Never lock students out because the filter could not be loaded
+            print(f"Error refreshing login filter: {str(e)}")
+            return True
+        return credential_digest(student_id, mobile) in self.digests
+
+    # Updates
+
+    def _add(self, digest):
+        self.digests.add(digest)
+
+    def _discard(self, digest):
+        self.digests.discard(digest)
+
+    def add(self, student_id, mobile):
+        self._record('_add', credential_digest(student_id, mobile))
+
+    def discard(self, student_id, mobile):
+        self._record('_discard', credential_digest(student_id, mobile))
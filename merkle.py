@@ -0,0 +1,375 @@
+"""Merkle-accumulated ballot receipts.
+
+Every accepted ballot becomes one leaf of an append-only Merkle tree
+(RFC 6962 hashing: leaves are SHA-256(0x00 || data), interior nodes
+SHA-256(0x01 || left || right)). The leaf data is the ballot's choices plus a
+random nonce, and the hex leaf hash is the receipt returned to the voter.
+
+Storage:
+  meta.merkle_tree      {'size': n, 'linked': m}: an atomic counter handing
+                        out leaf indexes, and the fully linked size
+  merkle_nodes          {'_id': '<level>:<index>', 'hash': hex} for every
+                        complete subtree; leaves get 'linked': True once
+                        their parents have been written
+
+Appends are lock-free and cost O(log n): a writer stores its leaf, then walks
+up while the sibling subtree already exists, writing each parent. Two writers
+finishing sibling subtrees both read after writing, so at least one of them
+always sees the other and writes the parent (parent writes are idempotent).
+Once every leaf below m is linked, every complete subtree below m exists, so
+the `linked` watermark is the largest size that can always be proven; it is
+advanced past the run of linked leaves after each append.
+
+Inclusion proofs against the linked root need O(log n) stored nodes, fetched
+in one query. `python merkle.py` audits the tree: one streaming pass over the
+votes (ordered by leaf_index) recomputes every leaf and the root with
+O(log n) memory. A writer killed between reserving its leaf and linking it
+holds the watermark back; `python merkle.py --repair` restores missing leaves
+from the votes (or a void leaf for a slot never written), rebuilds missing
+interior nodes and moves the watermark to the full size.
+"""
+import argparse
+import hashlib
+import json
+import os
+import secrets
+
+from pymongo import ReturnDocument
+
+TREE_ID = 'merkle_tree'
+# Leaves checked per query while advancing the linked watermark
+LINK_WINDOW = 64
+# Stand-in for a leaf index that was reserved but never written
+VOID_LEAF = hashlib.sha256(b'\x00').hexdigest()
+
+
+class TreeIncomplete(Exception):
+    """A concurrent append has not finished writing its nodes yet"""
+
+
+def leaf_hash(data):
+    return hashlib.sha256(b'\x00' + data).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def ballot_leaf_data(nonce, votes):
+    """Canonical bytes for a {position_id: nominee_id} ballot"""
+    choices = sorted([position_id, nominee_id] for position_id, nominee_id in votes.items())
+    return json.dumps({'nonce': nonce, 'votes': choices}, separators=(',', ':')).encode()
+
+
+def new_receipt(votes):
+    """Returns (receipt hex, nonce) for a ballot"""
+    nonce = secrets.token_hex(16)
+    return leaf_hash(ballot_leaf_data(nonce, votes)).hex(), nonce
+
+
+def node_key(level, index):
+    return f'{level}:{index}'
+
+
+def largest_power_of_two_below(n):
+    k = 1
+    while k * 2 < n:
+        k *= 2
+    return k
+
+
+def range_nodes(start, end):
+    """Stored (level, index) nodes whose RFC 6962 combination is MTH(D[start:end])"""
+    size = end - start
+    if size & (size - 1) == 0:
+        level = size.bit_length() - 1
+        return [(level, start >> level)]
+    k = largest_power_of_two_below(size)
+    return range_nodes(start, start + k) + range_nodes(start + k, end)
+
+
+def range_hash(start, end, nodes):
+    size = end - start
+    if size & (size - 1) == 0:
+        level = size.bit_length() - 1
+        return nodes[(level, start >> level)]
+    k = largest_power_of_two_below(size)
+    return node_hash(range_hash(start, start + k, nodes), range_hash(start + k, end, nodes))
+
+
+def audit_ranges(index, start, end):
+    """Leaf ranges whose hashes form the audit path for a leaf, bottom-up"""
+    if end - start == 1:
+        return []
+    k = largest_power_of_two_below(end - start)
+    if index < start + k:
+        return audit_ranges(index, start, start + k) + [(start + k, end)]
+    return audit_ranges(index, start + k, end) + [(start, start + k)]
+
+
+def verify_proof(leaf, index, size, proof, root):
+    """Check an inclusion proof (RFC 9162, section 2.1.3.2); all hashes as bytes"""
+    if index >= size:
+        return False
+    fn, sn, r = index, size - 1, leaf
+    for p in proof:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
+
+
+class ReceiptTree:
+    def __init__(self, get_db):
+        self.get_db = get_db
+
+    def size(self):
+        doc = self.get_db().meta.find_one({'_id': TREE_ID})
+        return doc.get('size', 0) if doc else 0
+
+    def linked_size(self):
+        """Size of the largest prefix whose leaves have all been linked"""
+        doc = self.get_db().meta.find_one({'_id': TREE_ID})
+        return doc.get('linked', 0) if doc else 0
+
+    def append(self, receipt):
+        """Reserve the next leaf index for a receipt and store the leaf; returns the index"""
+        db = self.get_db()
+        doc = db.meta.find_one_and_update(
+            {'_id': TREE_ID}, {'$inc': {'size': 1}}, upsert=True, return_document=ReturnDocument.AFTER)
+        index = doc['size'] - 1
+        db.merkle_nodes.insert_one({'_id': node_key(0, index), 'hash': receipt})
+        return index
+
+    def complete(self, index, receipt):
+        """Write the parents of a stored leaf, stopping at the first missing sibling, then mark it linked.
+
+        Call it even when recording the ballot failed: an unlinked leaf holds
+        the linked watermark, and with it every newer receipt, back.
+        """
+        nodes = self.get_db().merkle_nodes
+        leaf, level, current = index, 0, bytes.fromhex(receipt)
+        while True:
+            sibling = nodes.find_one({'_id': node_key(level, index ^ 1)})
+            if not sibling:
+                break
+            sibling = bytes.fromhex(sibling['hash'])
+            current = node_hash(sibling, current) if index & 1 else node_hash(current, sibling)
+            level, index = level + 1, index >> 1
+            nodes.update_one({'_id': node_key(level, index)}, {'$set': {'hash': current.hex()}}, upsert=True)
+        nodes.update_one({'_id': node_key(0, leaf)}, {'$set': {'linked': True}})
+        self.advance_linked()
+
+    def advance_linked(self):
+        """Move the linked watermark past the run of linked leaves that follows it"""
+        db = self.get_db()
+        doc = db.meta.find_one({'_id': TREE_ID}) or {}
+        size, start = doc.get('size', 0), doc.get('linked', 0)
+        linked = start
+        while linked < size:
+            end = min(linked + LINK_WINDOW, size)
+            found = {d['_id'] for d in db.merkle_nodes.find(
+                {'_id': {'$in': [node_key(0, i) for i in range(linked, end)]}, 'linked': True}, {'_id': 1})}
+            while linked < end and node_key(0, linked) in found:
+                linked += 1
+            if linked < end:
+                break
+        if linked > start:
+            db.meta.update_one({'_id': TREE_ID}, {'$max': {'linked': linked}})
+        return linked
+
+    def _fetch(self, keys):
+        docs = self.get_db().merkle_nodes.find({'_id': {'$in': [node_key(*k) for k in keys]}})
+        found = {tuple(int(part) for part in d['_id'].split(':')): bytes.fromhex(d['hash']) for d in docs}
+        if len(found) != len(set(keys)):
+            raise TreeIncomplete()
+        return found
+
+    def root(self, size=None):
+        """Root over the first `size` leaves, by default the linked size"""
+        size = self.linked_size() if size is None else size
+        if size == 0:
+            return hashlib.sha256(b'').digest()
+        return range_hash(0, size, self._fetch(range_nodes(0, size)))
+
+    def proof(self, index, size=None):
+        """Returns (size, root, audit path) for a leaf, all hashes as bytes.
+
+        Proves against the linked size by default, so appends still in
+        progress never get in the way; a leaf beyond it raises TreeIncomplete.
+        """
+        size = self.linked_size() if size is None else size
+        if index >= size:
+            raise TreeIncomplete()
+        ranges = audit_ranges(index, 0, size)
+        keys = range_nodes(0, size) + [k for r in ranges for k in range_nodes(*r)]
+        nodes = self._fetch(keys)
+        path = [range_hash(start, end, nodes) for start, end in ranges]
+        return size, range_hash(0, size, nodes), path
+
+    def reset(self):
+        db = self.get_db()
+        db.merkle_nodes.delete_many({})
+        db.meta.delete_one({'_id': TREE_ID})
+
+
+def repair(db):
+    """Restore missing leaves and interior nodes, then link the whole tree.
+
+    Missing leaves are restored from the receipts stored on the votes, or
+    set to VOID_LEAF when the index was reserved but its ballot never
+    written. Holds every leaf hash in memory. Returns a report dict.
+    """
+    tree = ReceiptTree(lambda: db)
+    size = tree.size()
+    report = {'size': size, 'restored_leaves': 0, 'void_leaves': 0, 'rebuilt_nodes': 0}
+    stored = {d['_id']: d['hash'] for d in db.merkle_nodes.find({}, {'hash': 1})}
+    receipts = {}
+    for vote in db.votes.find({'leaf_index': {'$exists': True}}, {'_id': 0, 'leaf_index': 1, 'receipt': 1}):
+        receipts.setdefault(vote['leaf_index'], vote['receipt'])
+
+    level_hashes = []
+    for index in range(size):
+        key = node_key(0, index)
+        if key not in stored:
+            if index in receipts:
+                stored[key] = receipts[index]
+                report['restored_leaves'] += 1
+            else:
+                stored[key] = VOID_LEAF
+                report['void_leaves'] += 1
+            db.merkle_nodes.update_one({'_id': key}, {'$set': {'hash': stored[key]}}, upsert=True)
+        level_hashes.append(bytes.fromhex(stored[key]))
+
+    level = 0
+    while len(level_hashes) > 1:
+        parents = []
+        for i in range(0, len(level_hashes) - 1, 2):
+            parent = node_hash(level_hashes[i], level_hashes[i + 1])
+            key = node_key(level + 1, i // 2)
+            if stored.get(key) != parent.hex():
+                db.merkle_nodes.update_one({'_id': key}, {'$set': {'hash': parent.hex()}}, upsert=True)
+                report['rebuilt_nodes'] += 1
+            parents.append(parent)
+        level_hashes, level = parents, level + 1
+
+    db.merkle_nodes.update_many({'_id': {'$regex': '^0:'}}, {'$set': {'linked': True}})
+    db.meta.update_one({'_id': TREE_ID}, {'$max': {'linked': size}})
+    report['root'] = tree.root(size).hex() if size else None
+    return report
+
+
+def audit(db):
+    """Recompute every leaf and the root from the votes in one streaming pass.
+
+    Returns a report dict; ballots deleted after they were counted show up as
+    'removed' and fall back to their stored leaf hash.
+    """
+    tree = ReceiptTree(lambda: db)
+    size = tree.size()
+    report = {'size': size, 'ballots': 0, 'mismatched': [], 'removed': [], 'missing_leaves': []}
+    frontier = []  # [(level, hash)], at most log2(n) entries
+
+    def push(h):
+        level = 0
+        while frontier and frontier[-1][0] == level:
+            h = node_hash(frontier.pop()[1], h)
+            level += 1
+        frontier.append((level, h))
+
+    def stored_leaf(index):
+        doc = db.merkle_nodes.find_one({'_id': node_key(0, index)})
+        if not doc:
+            report['missing_leaves'].append(index)
+            return None
+        report['removed'].append(index)
+        return bytes.fromhex(doc['hash'])
+
+    def flush(index, ballot):
+        nonce, receipt = ballot['nonce'], ballot['receipt']
+        computed = leaf_hash(ballot_leaf_data(nonce, ballot['votes']))
+        if computed.hex() != receipt:
+            report['mismatched'].append(index)
+        push(computed)
+        report['ballots'] += 1
+
+    cursor = db.votes.find(
+        {'leaf_index': {'$exists': True}},
+        {'_id': 0, 'leaf_index': 1, 'receipt': 1, 'receipt_nonce': 1, 'position_id': 1, 'nominee_id': 1}
+    ).sort('leaf_index', 1)
+
+    expected, ballot = 0, None
+    for vote in cursor:
+        index = vote['leaf_index']
+        if ballot and ballot['index'] != index:
+            flush(ballot['index'], ballot)
+            expected, ballot = ballot['index'] + 1, None
+        if ballot is None:
+            for gap in range(expected, index):
+                leaf = stored_leaf(gap)
+                if leaf is not None:
+                    push(leaf)
+            ballot = {'index': index, 'nonce': vote['receipt_nonce'], 'receipt': vote['receipt'], 'votes': {}}
+        ballot['votes'][vote['position_id']] = vote['nominee_id']
+    if ballot:
+        flush(ballot['index'], ballot)
+        expected = ballot['index'] + 1
+    for gap in range(expected, size):
+        leaf = stored_leaf(gap)
+        if leaf is not None:
+            push(leaf)
+
+    if report['missing_leaves']:
+        report['root'] = None
+    else:
+        root = hashlib.sha256(b'').digest() if not frontier else None
+        for _, h in reversed(frontier):
+            root = h if root is None else node_hash(h, root)
+        report['root'] = root.hex()
+    try:
+        report['stored_root'] = tree.root(size).hex()
+    except TreeIncomplete:
+        report['stored_root'] = None
+    report['ok'] = (not report['mismatched'] and report['root'] is not None
+                    and report['root'] == report['stored_root'])
+    return report
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Audit ballot receipts against the stored Merkle root.')
+    parser.add_argument('--uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/college_voting'))
+    parser.add_argument('--repair', action='store_true',
+                        help='rebuild missing leaves and interior nodes before auditing')
+    args = parser.parse_args()
+
+    try:
+        db = MongoClient(args.uri).get_default_database('college_voting')
+        if args.repair:
+            fixed = repair(db)
+            print(f"Repaired tree of size {fixed['size']}: {fixed['restored_leaves']} leaves restored from votes, "
+                  f"{fixed['void_leaves']} void leaves, {fixed['rebuilt_nodes']} interior nodes rebuilt.")
+        report = audit(db)
+        print(f"Tree size: {report['size']} ({report['ballots']} ballots in votes)")
+        print(f"Recomputed root: {report['root']}")
+        print(f"Stored root:     {report['stored_root']}")
+        if report['removed']:
+            print(f"Ballots removed from votes after counting: {len(report['removed'])}")
+        if report['missing_leaves']:
+            print(f"Missing leaves: {report['missing_leaves'][:20]}")
+        if report['mismatched']:
+            print(f"Ballots whose votes do not match their receipt: {report['mismatched'][:20]}")
+        print("Audit passed." if report['ok'] else "Audit FAILED.")
+    except Exception as e:
+        print(f"Error: {e}")
@@ -0,0 +1,182 @@
+"""Opt-in request profiler.
+
+A request is profiled when it carries a valid signed X-Profile-Token header
+minted from the admin profiles page. Sampling endpoints (PROFILE_ROUTES,
+PROFILE_SAMPLE_RATE) is off unless PROFILING=1 is set, so without it the only
+per-request cost is a header lookup. Each profiled request writes a cProfile .prof file and a JSON
+summary (top cumulative functions, Mongo time and command count) to
+PROFILE_DIR, keeping only the newest PROFILE_KEEP requests.
+"""
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, g, request
+from itsdangerous import BadData, URLSafeTimedSerializer
+from pymongo import monitoring
+
+PROFILING = os.getenv('PROFILING') == '1'
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_ROUTES = [r.strip() for r in os.getenv('PROFILE_ROUTES', '').split(',') if r.strip()]
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0.01))
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 200))
+PROFILE_HEADER = 'X-Profile-Token'
+TOKEN_MAX_AGE = 3600
+TOP_FUNCTIONS = 25
+
+_local = threading.local()
+
+
+class MongoTimer(monitoring.CommandListener):
+    """Accumulates Mongo command time for the request being profiled on this thread"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        stats = getattr(_local, 'mongo', None)
+        if stats is not None:
+            stats['commands'] += 1
+            stats['seconds'] += event.duration_micros / 1e6
+
+
+def mongo_listeners():
+    """Event listeners for the MongoClient; they only record while a request is profiled"""
+    return [MongoTimer()]
+
+
+def token_serializer(app):
+    return URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='profile-token')
+
+
+def make_token(app, admin_id):
+    return token_serializer(app).dumps(admin_id)
+
+
+def init_app(app):
+    # Installed even when PROFILING is off, so the on-demand header keeps working
+    app.before_request(_start)
+    app.after_request(_stop)
+    app.teardown_request(_teardown)
+    if PROFILING:
+        print(f"Request profiling enabled, writing to {PROFILE_DIR}")
+
+
+def _should_profile(app):
+    token = request.headers.get(PROFILE_HEADER)
+    if token:
+        try:
+            token_serializer(app).loads(token, max_age=TOKEN_MAX_AGE)
+            return True
+        except BadData:
+            pass
+    if not PROFILING:
+        return False
+    if request.endpoint in PROFILE_ROUTES or '*' in PROFILE_ROUTES:
+        return random.random() < PROFILE_SAMPLE_RATE
+    return False
+
+
+def _start():
+    if not _should_profile(current_app):
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another request on a different thread is already being profiled
+        return
+    g.profile = profile
+    g.profile_started = time.perf_counter()
+    _local.mongo = {'commands': 0, 'seconds': 0.0}
+
+
+def _stop(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    profile.disable()
+    wall = time.perf_counter() - g.pop('profile_started')
+    mongo = _local.mongo
+    _local.mongo = None
+    try:
+        _write(profile, wall, mongo, response.status_code)
+    except Exception as e:
+        print(f"Error writing profile: {str(e)}")
+    return response
+
+
+def _teardown(exc):
+    # Requests that never produced a response must not leave the profiler running
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.disable()
+        _local.mongo = None
+
+
+def _write(profile, wall, mongo, status):
+    name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{request.endpoint}"
+    base = os.path.join(PROFILE_DIR, name)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile.dump_stats(base + '.prof')
+
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    top = [{
+        'function': f'{func[0]}:{func[1]}({func[2]})',
+        'calls': values[1],
+        'tottime': round(values[2], 6),
+        'cumtime': round(values[3], 6)
+    } for func, values in rows[:TOP_FUNCTIONS]]
+
+    summary = {
+        'name': name,
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.path,
+        'status': status,
+        'created_at': datetime.utcnow().isoformat(),
+        'wall_ms': round(wall * 1000, 3),
+        'mongo_ms': round(mongo['seconds'] * 1000, 3),
+        'mongo_commands': mongo['commands'],
+        'top_functions': top
+    }
+    with open(base + '.json', 'w') as f:
+        json.dump(summary, f)
+    _rotate()
+
+
+def _rotate():
+    summaries = sorted(glob.glob(os.path.join(PROFILE_DIR, '*.json')))
+    for path in summaries[:-max(PROFILE_KEEP, 1)]:
+        for ext in ('.json', '.prof'):
+            try:
+                os.remove(path[:-len('.json')] + ext)
+            except OSError:
+                pass
+
+
+def list_profiles(limit=100):
+    """Newest-first profile summaries"""
+    summaries = sorted(glob.glob(os.path.join(PROFILE_DIR, '*.json')), reverse=True)[:limit]
+    profiles = []
+    for path in summaries:
+        try:
+            with open(path) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
@@ -0,0 +1,277 @@
+"""Query-count and latency regression run for every route.
+
+Builds fixtures of increasing size (default 100, 1k and 10k students) in a
+scratch database with generate_data.py, drives every route through the Flask
+test client, and records each Mongo command with a pymongo command listener.
+
+Fails (exit status 1) when:
+  - a route issues more commands at a larger size than at the smallest one,
+    i.e. its query count grows with the data instead of staying constant
+  - a route issues more commands than in the stored baseline
+  - a route's median latency exceeds baseline * --threshold (+ --slack-ms)
+  - there is no stored baseline and --update-baseline was not given
+
+Needs a running MongoDB; the scratch database is dropped for every size.
+
+    python query_regression.py                       # compare with query_baseline.json
+    python query_regression.py --update-baseline     # accept the current numbers
+    python query_regression.py --sizes 100,1000 --output timings.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from jinja2 import ChoiceLoader, FunctionLoader
+from pymongo import MongoClient, monitoring
+
+# Indexes are built against each fixture below, not against MONGO_URI at import
+os.environ.setdefault('PRELOAD_INDEXES', '0')
+import app as vote_app
+import generate_data
+from vote4campus.db import ensure_indexes
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_URI = os.getenv('REGRESSION_MONGO_URI', 'mongodb://localhost:27017/vote4campus_regression')
+# Cursor bookkeeping grows with result size in bytes, not with per-row queries
+IGNORED_COMMANDS = {'getMore', 'killCursors', 'endSessions'}
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = {}
+
+    def reset(self):
+        self.commands = {}
+
+    @property
+    def total(self):
+        return sum(self.commands.values())
+
+    def started(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            self.commands[event.command_name] = self.commands.get(event.command_name, 0) + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def load_repo_template(name):
+    # Templates are checked in at the repo root, some with a " (1)" download suffix
+    for candidate in (name, name.replace('.html', ' (1).html')):
+        path = os.path.join(ROOT, candidate)
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8') as f:
+                return f.read(), path, lambda: True
+    return None
+
+
+def build_fixture(client, uri, size, fresh_students):
+    db = client.get_default_database('college_voting')
+    client.drop_database(db.name)
+    generate_data.generate(SimpleNamespace(
+        uri=uri, students=size, branches='CSE,ECE,EEE,MECH', sections='A,B,C',
+        positions=5, candidates=4, turnout=0.5, skew=1.2, hours=8.0, seed=42,
+        batch_size=5000, drop=False))
+    ensure_indexes(db)
+    db.users.insert_one({
+        'student_id': 'ADMIN00100', 'name': 'Admin User', 'mobile': '9999999999',
+        'branch': 'ADMIN', 'section': 'A', 'is_admin': True, 'has_voted': False
+    })
+    db.voting_schedule.insert_one({
+        '_id': 'current_schedule', 'start_date': '2000-01-01', 'end_date': '2099-12-31',
+        'start_time': '00:00', 'end_time': '23:59'
+    })
+    voters = list(db.users.find({'has_voted': False, 'is_admin': False}, limit=fresh_students + 1))
+    return db, voters
+
+
+def login_as(client, user):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user['_id'])
+        session['_fresh'] = True
+
+
+def route_cases(db, voters):
+    """(name, request function) for every route; each submit_vote call uses a fresh voter"""
+    browser_user = voters[0]
+    fresh = iter(voters[1:])
+    receipts = []
+    positions = vote_app.ballot_cache.get()
+
+    def submit_vote(http):
+        voter = next(fresh)
+        login_as(http, voter)
+        ballot = {p['_id']: p['candidates'][0]['_id'] for p in positions}
+        response = http.post('/submit_vote', json=ballot)
+        if response.get_json().get('receipt'):
+            receipts.append(response.get_json()['receipt'])
+        return response
+
+    def student(path, method='get', **kwargs):
+        def call(http):
+            login_as(http, browser_user)
+            return getattr(http, method)(path, **kwargs)
+        return call
+
+    def admin(path):
+        def call(http):
+            login_as(http, db.users.find_one({'student_id': 'ADMIN00100'}))
+            return http.get(path)
+        return call
+
+    def admin_dashboard(http):
+        # Measure the dashboard queries themselves, not the cached snapshot
+        vote_app.dashboard_cache.invalidate()
+        return admin('/admin')(http)
+
+    return [
+        ('index', lambda http: http.get('/')),
+        ('login_page', lambda http: http.get('/login')),
+        ('login_unknown', lambda http: http.post('/login', data={
+            'student_id': '0000000000', 'mobile_number': '0000000000', 'user_type': 'user'})),
+        ('login_valid', lambda http: http.post('/login', data={
+            'student_id': browser_user['student_id'], 'mobile_number': browser_user['mobile'], 'user_type': 'user'})),
+        ('voting_page', student('/voting')),
+        ('check_voting_status', student('/check_voting_status')),
+        ('get_voting_schedule', student('/get_voting_schedule')),
+        ('submit_vote', submit_vote),
+        ('verify_receipt', lambda http: http.get(f'/verify_receipt?receipt={receipts[-1]}')),
+        ('admin_dashboard', admin_dashboard),
+        ('voting_stats', admin('/admin/voting_stats?branch=CSE')),
+        ('non_voters', admin('/admin/non_voters?branch=CSE&section=A&page=2')),
+        ('search_students', admin('/admin/students/search?q=a&branch=CSE&page=2')),
+        ('export_voters', admin('/admin/export_voters')),
+        ('admin_voting_schedule', admin('/admin/get_voting_schedule')),
+    ]
+
+
+def measure(uri, size, repeat):
+    counter = CommandCounter()
+    client = MongoClient(uri, event_listeners=[counter])
+    db, voters = build_fixture(client, uri, size, repeat + 1)
+
+    vote_app.mongo.cx = client
+    vote_app.mongo.db = db
+    vote_app.ballot_cache.positions = None
+    vote_app.ballot_cache.fragment = None
+    vote_app.ballot_cache.warm()
+    vote_app.schedule_cache.version = None
+    # Rebuild the in-memory indexes from this size's fixture; the warm-up calls below pay for the builds
+    for index in (vote_app.login_filter, vote_app.voter_roll, vote_app.student_index):
+        index.reset()
+        index.resync_interval = float('inf')
+    vote_app.login_filter.build()  # the login cases measure lookups, not the first build
+    vote_app.login_filter.refresh_interval = float('inf')  # keep periodic refreshes out of the counts
+
+    results = {}
+    http = vote_app.app.test_client()
+    for name, call in route_cases(db, voters):
+        call(http)  # warm-up, also creates the receipt verify_receipt needs
+        timings, commands, by_command = [], 0, {}
+        for _ in range(repeat):
+            with vote_app.app.test_client() as http:
+                counter.reset()
+                started = time.perf_counter()
+                response = call(http)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 500:
+                raise RuntimeError(f'{name} returned {response.status_code} at size {size}')
+            commands = max(commands, counter.total)
+            by_command = dict(counter.commands)
+        results[name] = {'commands': commands, 'by_command': by_command, 'ms': round(statistics.median(timings), 3)}
+        print(f"  {name:<24}{commands:>6} commands {results[name]['ms']:>10.2f} ms")
+
+    client.drop_database(db.name)
+    client.close()
+    return results
+
+
+def configure_app():
+    """Test-client settings for driving every route without CSRF tokens"""
+    vote_app.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    vote_app.app.jinja_loader = ChoiceLoader([vote_app.app.jinja_loader, FunctionLoader(load_repo_template)])
+
+
+def growth_failures(results, sizes):
+    """Routes whose command count at a larger size exceeds the smallest size's"""
+    failures = []
+    smallest = str(sizes[0])
+    for route in results[smallest]:
+        base = results[smallest][route]['commands']
+        for size in sizes[1:]:
+            count = results[str(size)][route]['commands']
+            if count > base:
+                failures.append(f'{route}: {count} commands at {size} students vs {base} at {smallest}')
+    return failures
+
+
+def compare(results, baseline, sizes, threshold, slack_ms):
+    failures = growth_failures(results, sizes)
+    for size, routes in (baseline or {}).items():
+        for route, expected in routes.items():
+            current = results.get(size, {}).get(route)
+            if not current:
+                continue
+            if current['commands'] > expected['commands']:
+                failures.append(f"{route}@{size}: {current['commands']} commands, baseline {expected['commands']}")
+            if current['ms'] > expected['ms'] * threshold + slack_ms:
+                failures.append(f"{route}@{size}: {current['ms']:.2f} ms, baseline {expected['ms']:.2f} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-route query count and latency regression run.')
+    parser.add_argument('--uri', default=DEFAULT_URI)
+    parser.add_argument('--sizes', default='100,1000,10000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default='query_baseline.json')
+    parser.add_argument('--output', default='query_timings.json')
+    parser.add_argument('--threshold', type=float, default=1.5, help='allowed latency ratio against the baseline')
+    parser.add_argument('--slack-ms', type=float, default=2.0, help='absolute latency allowance for noise')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        # Without a baseline only the growth check would run; fail rather than pass silently
+        raise SystemExit(f'No baseline at {args.baseline}; run with --update-baseline to record one.')
+
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    configure_app()
+
+    results = {}
+    for size in sizes:
+        print(f"{size} students:")
+        results[str(size)] = measure(args.uri, size, args.repeat)
+
+    with open(args.output, 'w') as f:
+        json.dump({'generated_at': datetime.utcnow().isoformat(), 'results': results}, f, indent=2)
+
+    baseline = None
+    if not args.update_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    failures = compare(results, baseline, sizes, args.threshold, args.slack_ms)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'generated_at': datetime.utcnow().isoformat(), 'results': results}, f, indent=2)
+        print(f"Baseline written to {args.baseline}.")
+
+    if failures:
+        print("Regressions:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("No regressions.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
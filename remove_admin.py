@@ -1,13 +1,9 @@
-from pymongo import MongoClient
+"""Remove admin users (default: the one create_admin.py creates).
 
-# MongoDB connection
-client = MongoClient('mongodb://localhost:27017/')
-db = client['college_voting']
+Kept for compatibility; use `python -m vote4campus admins remove`.
+"""
+import sys
 
-# Remove admin0001 user
-result = db.users.delete_one({'student_id': 'ADMIN0001'})
+from vote4campus.cli import main
 
-if result.deleted_count > 0:
-    print("Admin0001 user has been removed successfully.")
-else:
-    print("Admin0001 user was not found in the database.") 
\ No newline at end of file
+sys.exit(main(['admins', 'remove'] + (sys.argv[1:] or ['ADMIN00100'])))
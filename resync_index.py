@@ -0,0 +1,139 @@
+"""Base class for the per-worker in-memory indexes over the student roll.
+
+Each worker keeps its own copy of an index (the voter roll, the student
+search index): built with one projected scan of users on first use, updated
+in place by the routes that change students, and rebuilt in the background
+every `resync_interval` seconds to pick up changes made by other workers and
+scripts. Updates made while a rebuild is scanning are recorded and replayed
+on top of the new copy before it replaces the current one.
+
+preload() starts the first builds in the background when the app is created,
+so requests arriving meanwhile wait for that single build instead of each
+scanning users. Locks are reset in forked children (gunicorn --preload), and a
+build the parent had not finished is redone in the child on first use.
+
+Subclasses implement load() (scan users into a fresh, unshared instance),
+adopt() (take over a loaded instance's data) and describe() (for the build
+log line), and route their updates through _record().
+"""
+import os
+import threading
+import time
+import weakref
+
+_indexes = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for index in list(_indexes):
+        index._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def preload(*indexes):
+    """Build each index in a background thread unless it is already built"""
+    def run():
+        for index in indexes:
+            try:
+                index.ensure_current()
+            except Exception as e:
+                # The first request that needs the index retries the build
+                print(f"Error preloading {index.name}: {str(e)}")
+    threading.Thread(target=run, daemon=True).start()
+
+
+class ResyncingIndex:
+    name = 'index'
+
+    def __init__(self, get_users, resync_interval=300):
+        self.get_users = get_users
+        self.resync_interval = resync_interval
+        self.ready = False
+        self.built_at = 0
+        self.pending = None  # updates made while a rebuild is scanning
+        self.resyncing = False
+        self.lock = threading.Lock()
+        self.build_lock = threading.RLock()
+        _indexes.add(self)
+
+    def _after_fork(self):
+        # A thread of the parent may have held these mid-build; it does not exist here
+        self.lock = threading.Lock()
+        self.build_lock = threading.RLock()
+        self.pending = None
+        self.resyncing = False
+
+    def load(self):
+        raise NotImplementedError
+
+    def adopt(self, index):
+        raise NotImplementedError
+
+    def describe(self):
+        return f'{self.name.capitalize()} built'
+
+    def build(self):
+        """Load the index with one projected scan of users"""
+        with self.build_lock:
+            self._build()
+
+    def _build(self):
+        started = time.time()
+        with self.lock:
+            self.pending = []
+        try:
+            index = self.load()
+            with self.lock:
+                for update, args in self.pending:
+                    getattr(index, update)(*args)
+                self.adopt(index)
+                self.ready = True
+                self.built_at = time.monotonic()
+        finally:
+            with self.lock:
+                self.pending = None
+        print(f"{self.describe()} in {time.time() - started:.2f}s")
+
+    def reset(self):
+        """Forget the current copy; the next read rebuilds it"""
+        with self.build_lock:
+            self.ready = False
+            self.built_at = 0
+
+    def ensure_current(self):
+        if not self.ready:
+            with self.build_lock:
+                # Concurrent first reads wait for a single build
+                if not self.ready:
+                    self._build()
+        elif time.monotonic() - self.built_at > self.resync_interval:
+            self._resync_in_background()
+
+    def _resync_in_background(self):
+        with self.lock:
+            if self.resyncing:
+                return
+            self.resyncing = True
+
+        def resync():
+            try:
+                self.build()
+            except Exception as e:
+                # Keep answering from the current copy; the next read retries
+                print(f"Error resyncing {self.name}: {str(e)}")
+            finally:
+                self.resyncing = False
+        threading.Thread(target=resync, daemon=True).start()
+
+    def _record(self, update, *args):
+        """Apply an update under the lock; returns False when there is no copy yet"""
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((update, args))
+            if not self.ready:
+                return False
+            getattr(self, update)(*args)
+            return True
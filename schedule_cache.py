@@ -0,0 +1,46 @@
+"""Per-worker cache of the voting schedule.
+
+Student pages poll /check_voting_status and /get_voting_schedule, but the
+schedule only changes through the admin schedule route, which bumps a version
+counter stored in meta.voting_schedule. As with the ballot catalog, readers
+compare that version (one tiny primary-key lookup) with the cached copy and
+only re-read the schedule when it changed, so the polling routes can answer
+a 304 from the version before building any JSON. Edit the schedule through
+the admin route (or bump the version) for workers to see the change.
+"""
+import threading
+
+from ballot_cache import bump_version
+
+SCHEDULE_VERSION_ID = 'voting_schedule'
+
+
+class ScheduleCache:
+    def __init__(self, get_db):
+        self.get_db = get_db
+        self.version = None
+        self.schedule = None
+        self.lock = threading.Lock()
+
+    def current_version(self):
+        doc = self.get_db().meta.find_one({'_id': SCHEDULE_VERSION_ID})
+        return doc.get('version', 0) if doc else 0
+
+    def get(self, version=None):
+        """The current schedule document (or None), as of `version` when given"""
+        if version is None:
+            version = self.current_version()
+        if self.version == version:
+            return self.schedule
+        schedule = self.get_db().voting_schedule.find_one({'_id': 'current_schedule'})
+        with self.lock:
+            self.schedule = schedule
+            self.version = version
+        return schedule
+
+    def invalidate(self):
+        """Bump the shared version after a schedule write so every worker reloads"""
+        bump_version(self.get_db(), SCHEDULE_VERSION_ID)
+        with self.lock:
+            self.version = None
+            self.schedule = None
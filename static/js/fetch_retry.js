@@ -0,0 +1,13 @@
+// Retry 503s after the server's Retry-After, with jitter so shed clients do not all return at once
+function fetchWithRetry(url, options, onRetry, attemptsLeft = 5) {
+    return fetch(url, options).then(response => {
+        if (response.status !== 503 || attemptsLeft <= 1) {
+            return response;
+        }
+        const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 1;
+        const delay = retryAfter * 1000 * (0.5 + Math.random());
+        if (onRetry) onRetry(delay);
+        return new Promise(resolve => setTimeout(resolve, delay))
+            .then(() => fetchWithRetry(url, options, onRetry, attemptsLeft - 1));
+    });
+}
@@ -0,0 +1,125 @@
+"""In-memory prefix index over the student roll for admin search.
+
+Every student is indexed under normalized (lowercased, whitespace-collapsed)
+keys kept in one sorted list:
+
+  - the student_id
+  - the name, and the rest of the name from each later word
+    ("anita rao k" -> "anita rao k", "rao k", "k")
+
+so a query matches student_id prefixes and any run of name words starting at
+a word boundary ("rao", "anita r", "rao k"). A lookup is a bisect to the
+first key with the query as prefix followed by a scan of the matching range
+that applies the branch/section filters as it goes and stops after
+`max_matches` students pass them.
+
+Like the voter roll, each worker keeps its own copy, updated by
+add_student/delete_student and resynced as described in resync_index.
+"""
+import bisect
+
+from resync_index import ResyncingIndex
+
+
+def normalize(text):
+    return ' '.join(str(text or '').lower().split())
+
+
+def index_keys(student):
+    keys = [normalize(student['student_id'])]
+    words = normalize(student.get('name')).split(' ')
+    keys.extend(' '.join(words[i:]) for i in range(len(words)) if words[i])
+    return keys
+
+
+class StudentIndex(ResyncingIndex):
+    name = 'student index'
+
+    def __init__(self, get_users, resync_interval=300, max_matches=2000):
+        super().__init__(get_users, resync_interval)
+        self.max_matches = max_matches
+        self.keys = []  # sorted [(key, student_id)]
+        self.students = {}  # student_id -> {'student_id', 'name', 'branch', 'section'}
+
+    def load(self):
+        index = StudentIndex(self.get_users)
+        cursor = self.get_users().find(
+            {'is_admin': {'$ne': True}}, {'_id': 0, 'student_id': 1, 'name': 1, 'branch': 1, 'section': 1})
+        for student in cursor:
+            index.students[student['student_id']] = student
+        index.keys = sorted((key, sid) for sid, student in index.students.items() for key in index_keys(student))
+        return index
+
+    def adopt(self, index):
+        self.keys, self.students = index.keys, index.students
+
+    def describe(self):
+        return f"Student index built with {len(self.students)} students ({len(self.keys)} keys)"
+
+    # Updates
+
+    def _add(self, student):
+        self._remove(student['student_id'])
+        self.students[student['student_id']] = student
+        for key in index_keys(student):
+            bisect.insort(self.keys, (key, student['student_id']))
+
+    def _remove(self, student_id):
+        student = self.students.pop(student_id, None)
+        if student is None:
+            return
+        for key in index_keys(student):
+            i = bisect.bisect_left(self.keys, (key, student_id))
+            if i < len(self.keys) and self.keys[i] == (key, student_id):
+                del self.keys[i]
+
+    def add(self, student):
+        self._record('_add', {field: student.get(field) for field in ('student_id', 'name', 'branch', 'section')})
+
+    def remove(self, student_id):
+        self._record('_remove', student_id)
+
+    # Queries
+
+    def search(self, query, branch=None, section=None, page=1, per_page=20):
+        """Matching students sorted by student_id, paged, with branch/section facet counts"""
+        self.ensure_current()
+        query = normalize(query)
+        if not query:
+            raise ValueError('Search query is required')
+        keys, students = self.keys, self.students
+
+        # Facets count every query match scanned, before the branch/section filters apply
+        facets = {'branch': {}, 'section': {}}
+        results, seen = [], set()
+        truncated = False
+        i = bisect.bisect_left(keys, (query,))
+        while i < len(keys) and keys[i][0].startswith(query):
+            sid = keys[i][1]
+            i += 1
+            if sid in seen:
+                continue
+            seen.add(sid)
+            student = students.get(sid)
+            if student is None:
+                continue
+            for facet in facets:
+                value = student.get(facet)
+                facets[facet][value] = facets[facet].get(value, 0) + 1
+            if (branch and student.get('branch') != branch) or (section and student.get('section') != section):
+                continue
+            if len(results) >= self.max_matches:
+                truncated = True
+                break
+            results.append(student)
+
+        results.sort(key=lambda s: s['student_id'])
+        start = (page - 1) * per_page
+        return {
+            'total': len(results),
+            'truncated': truncated,
+            'page': page,
+            'per_page': per_page,
+            'students': results[start:start + per_page],
+            'facets': facets
+        }
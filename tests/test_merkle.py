@@ -0,0 +1,166 @@
+import hashlib
+import unittest
+
+import mongomock
+
+import merkle
+
+
+def reference_root(leaves):
+    """MTH from RFC 6962, section 2.1, computed directly from the leaf hashes"""
+    if not leaves:
+        return hashlib.sha256(b'').digest()
+    if len(leaves) == 1:
+        return leaves[0]
+    k = merkle.largest_power_of_two_below(len(leaves))
+    return merkle.node_hash(reference_root(leaves[:k]), reference_root(leaves[k:]))
+
+
+def cast(db, tree, votes, link=True):
+    """Record a ballot the way submit_vote does; returns (receipt, leaf_index)"""
+    receipt, nonce = merkle.new_receipt(votes)
+    index = tree.append(receipt)
+    db.votes.insert_many([{
+        'position_id': position_id, 'nominee_id': nominee_id,
+        'receipt': receipt, 'receipt_nonce': nonce, 'leaf_index': index
+    } for position_id, nominee_id in votes.items()])
+    if link:
+        tree.complete(index, receipt)
+    return receipt, index
+
+
+class RangeNodesTest(unittest.TestCase):
+    def test_nodes_are_aligned_and_cover_the_range(self):
+        for size in range(1, 70):
+            covered = 0
+            for level, index in merkle.range_nodes(0, size):
+                self.assertEqual(index << level, covered)
+                covered += 1 << level
+            self.assertEqual(covered, size)
+
+    def test_range_hash_matches_reference_root(self):
+        leaves = [merkle.leaf_hash(bytes([i])) for i in range(40)]
+        for size in range(1, len(leaves) + 1):
+            nodes = {}
+            for level, index in merkle.range_nodes(0, size):
+                span = leaves[index << level:(index + 1) << level]
+                nodes[(level, index)] = reference_root(span)
+            self.assertEqual(merkle.range_hash(0, size, nodes), reference_root(leaves[:size]))
+
+
+class VerifyProofTest(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.tree = merkle.ReceiptTree(lambda: self.db)
+        self.receipts = [cast(self.db, self.tree, {'p1': f'n{i}'})[0] for i in range(23)]
+
+    def test_every_receipt_verifies(self):
+        leaves = [bytes.fromhex(r) for r in self.receipts]
+        for index, receipt in enumerate(self.receipts):
+            size, root, path = self.tree.proof(index)
+            self.assertEqual(size, len(self.receipts))
+            self.assertEqual(root, reference_root(leaves))
+            self.assertTrue(merkle.verify_proof(leaves[index], index, size, path, root))
+
+    def test_proofs_against_older_sizes_verify(self):
+        leaves = [bytes.fromhex(r) for r in self.receipts]
+        for size in range(1, len(leaves) + 1):
+            for index in range(size):
+                _, root, path = self.tree.proof(index, size)
+                self.assertEqual(root, reference_root(leaves[:size]))
+                self.assertTrue(merkle.verify_proof(leaves[index], index, size, path, root))
+
+    def test_tampered_proofs_fail(self):
+        leaf = bytes.fromhex(self.receipts[5])
+        size, root, path = self.tree.proof(5)
+        self.assertFalse(merkle.verify_proof(leaf, 6, size, path, root))
+        self.assertFalse(merkle.verify_proof(leaf, 5, size, path[:-1], root))
+        self.assertFalse(merkle.verify_proof(leaf, size, size, path, root))
+        bad = list(path)
+        bad[0] = hashlib.sha256(bad[0]).digest()
+        self.assertFalse(merkle.verify_proof(leaf, 5, size, bad, root))
+
+
+class LinkedSizeTest(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.tree = merkle.ReceiptTree(lambda: self.db)
+
+    def test_unlinked_leaf_holds_the_watermark_back(self):
+        for i in range(4):
+            cast(self.db, self.tree, {'p1': f'n{i}'})
+        stalled, _ = cast(self.db, self.tree, {'p1': 'n4'}, link=False)
+        receipts = [cast(self.db, self.tree, {'p1': f'n{i}'})[0] for i in range(5, 7)]
+
+        self.assertEqual(self.tree.size(), 7)
+        self.assertEqual(self.tree.linked_size(), 4)
+        # Older receipts keep verifying against the linked root
+        size, root, path = self.tree.proof(2)
+        self.assertEqual(size, 4)
+        leaf = bytes.fromhex(self.db.merkle_nodes.find_one({'_id': '0:2'})['hash'])
+        self.assertTrue(merkle.verify_proof(leaf, 2, size, path, root))
+        with self.assertRaises(merkle.TreeIncomplete):
+            self.tree.proof(6)
+
+        # Linking the stalled leaf releases everything behind it
+        self.tree.complete(4, stalled)
+        self.assertEqual(self.tree.linked_size(), 7)
+        size, root, path = self.tree.proof(6)
+        self.assertTrue(merkle.verify_proof(bytes.fromhex(receipts[-1]), 6, size, path, root))
+
+    def test_repair_rebuilds_after_a_killed_writer(self):
+        for i in range(3):
+            cast(self.db, self.tree, {'p1': f'n{i}'})
+        cast(self.db, self.tree, {'p1': 'n3'}, link=False)
+        # A writer killed after reserving an index, before storing its leaf
+        self.db.meta.update_one({'_id': merkle.TREE_ID}, {'$inc': {'size': 1}})
+        receipts = [cast(self.db, self.tree, {'p1': f'n{i}'})[0] for i in range(5, 9)]
+        self.assertEqual(self.tree.linked_size(), 3)
+
+        report = merkle.repair(self.db)
+        self.assertEqual(report['void_leaves'], 1)
+        self.assertEqual(self.tree.linked_size(), 9)
+        for index in range(9):
+            size, root, path = self.tree.proof(index)
+            leaf = bytes.fromhex(self.db.merkle_nodes.find_one({'_id': merkle.node_key(0, index)})['hash'])
+            self.assertTrue(merkle.verify_proof(leaf, index, size, path, root))
+        self.assertEqual(self.tree.proof(8)[0], 9)
+        self.assertEqual(bytes.fromhex(receipts[-1]),
+                         bytes.fromhex(self.db.merkle_nodes.find_one({'_id': '0:8'})['hash']))
+
+
+class AuditTest(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.tree = merkle.ReceiptTree(lambda: self.db)
+        for i in range(11):
+            cast(self.db, self.tree, {'p1': f'n{i % 3}', 'p2': f'm{i % 2}'})
+
+    def test_untouched_tree_passes(self):
+        report = merkle.audit(self.db)
+        self.assertTrue(report['ok'])
+        self.assertEqual(report['ballots'], 11)
+        self.assertEqual(report['root'], self.tree.root().hex())
+
+    def test_changed_vote_is_reported(self):
+        self.db.votes.update_one({'leaf_index': 4, 'position_id': 'p1'}, {'$set': {'nominee_id': 'other'}})
+        report = merkle.audit(self.db)
+        self.assertFalse(report['ok'])
+        self.assertEqual(report['mismatched'], [4])
+
+    def test_removed_ballot_falls_back_to_its_stored_leaf(self):
+        self.db.votes.delete_many({'leaf_index': 7})
+        report = merkle.audit(self.db)
+        self.assertTrue(report['ok'])
+        self.assertEqual(report['removed'], [7])
+
+    def test_missing_leaf_fails(self):
+        self.db.votes.delete_many({'leaf_index': 2})
+        self.db.merkle_nodes.delete_one({'_id': '0:2'})
+        report = merkle.audit(self.db)
+        self.assertFalse(report['ok'])
+        self.assertEqual(report['missing_leaves'], [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+"""Route query counts must not grow with the size of the student roll.
+
+Runs query_regression's measurement against the scratch database at
+REGRESSION_MONGO_URI (skipped when no MongoDB answers there). Latency
+against a stored baseline stays with `python query_regression.py`, since
+it depends on the machine.
+"""
+import os
+import unittest
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+SIZES = sorted(int(s) for s in os.getenv('REGRESSION_SIZES', '100,1000').split(','))
+
+
+class QueryCountTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import query_regression
+        try:
+            MongoClient(query_regression.DEFAULT_URI, serverSelectionTimeoutMS=1000).admin.command('ping')
+        except PyMongoError:
+            raise unittest.SkipTest(f'No MongoDB at {query_regression.DEFAULT_URI}')
+        query_regression.configure_app()
+        cls.regression = query_regression
+        cls.results = {str(size): query_regression.measure(query_regression.DEFAULT_URI, size, 1) for size in SIZES}
+
+    def test_command_counts_do_not_grow_with_data(self):
+        self.assertEqual(self.regression.growth_failures(self.results, SIZES), [])
@@ -0,0 +1,11 @@
+"""Command line administration for Vote4Campus.
+
+Run with `python -m vote4campus --help`. The CLI talks to MongoDB directly
+through one pooled client and never imports the Flask app, so it starts fast
+and can run on machines without the web dependencies' configuration.
+
+The package itself only needs pymongo and python-dotenv. `seed` and
+`check --consistency` reuse election_import.py and consistency_check.py (and
+ballot_cache.py) from the repository root, so run the CLI from a checkout;
+`python -m vote4campus` puts the current directory on sys.path.
+"""
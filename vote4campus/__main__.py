@@ -0,0 +1,5 @@
+import sys
+
+from vote4campus.cli import main
+
+sys.exit(main())
@@ -0,0 +1,334 @@
+"""vote4campus command line interface.
+
+    python -m vote4campus users add --student-id 23251A6660 --name Nithya --mobile 6303917738 --branch CSE --section A
+    python -m vote4campus users import students.csv        # or "-" for stdin; CSV or JSON lines
+    python -m vote4campus users remove 23251A6660 ...      # or --file ids.txt / --file -
+    python -m vote4campus admins add --student-id ADMIN00100 --name "Admin User" --mobile 9999999999
+    python -m vote4campus admins remove ADMIN00100
+    python -m vote4campus admins list
+    python -m vote4campus seed [election.yaml] [--replace]
+    python -m vote4campus check [--student-id ID] [--consistency] [--repair]
+    python -m vote4campus indexes
+    python -m vote4campus stats
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from vote4campus.db import ensure_indexes, get_db
+
+STUDENT_FIELDS = ['student_id', 'name', 'mobile', 'branch', 'section']
+ID_LENGTH = 10  # LoginForm requires 10 character student IDs and mobile numbers
+
+SAMPLE_BALLOT = {
+    'positions': [
+        {'title': 'President', 'candidates': [
+            {'name': 'Alice', 'branch': 'CSE', 'section': 'A', 'image_url': 'https://randomuser.me/api/portraits/women/1.jpg'},
+            {'name': 'Bob', 'branch': 'ECE', 'section': 'A', 'image_url': 'https://randomuser.me/api/portraits/men/2.jpg'},
+            {'name': 'Mary', 'branch': 'EEE', 'section': 'B', 'image_url': 'https://randomuser.me/api/portraits/women/3.jpg'}
+        ]},
+        {'title': 'Vice President', 'candidates': [
+            {'name': 'Carol', 'branch': 'CSE', 'section': 'B', 'image_url': 'https://randomuser.me/api/portraits/women/4.jpg'},
+            {'name': 'Peter', 'branch': 'MECH', 'section': 'A', 'image_url': 'https://randomuser.me/api/portraits/men/5.jpg'},
+            {'name': 'John', 'branch': 'IT', 'section': 'C', 'image_url': 'https://randomuser.me/api/portraits/men/6.jpg'}
+        ]}
+    ]
+}
+
+
+def progress(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def open_stream(path):
+    return sys.stdin if path == '-' else open(path, newline='')
+
+
+def read_records(stream, fmt):
+    """Yield dicts from a CSV (with header) or JSON lines stream"""
+    if fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(stream)
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def build_user(record, is_admin=False):
+    """Validate a student record; returns (document, error)"""
+    record = {k: str(record.get(k) or '').strip() for k in STUDENT_FIELDS}
+    missing = [field for field in STUDENT_FIELDS if not record[field]]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    if len(record['student_id']) != ID_LENGTH or len(record['mobile']) != ID_LENGTH:
+        return None, f'student_id and mobile must be {ID_LENGTH} characters'
+    return {
+        **record,
+        'has_voted': False,
+        'is_admin': is_admin,
+        'created_at': datetime.utcnow()
+    }, None
+
+
+def insert_users(db, docs):
+    """insert_many that skips existing student IDs; returns (inserted, duplicates)"""
+    try:
+        result = db.users.insert_many(docs, ordered=False)
+        return len(result.inserted_ids), 0
+    except BulkWriteError as e:
+        duplicates = sum(1 for err in e.details['writeErrors'] if err['code'] == 11000)
+        if duplicates != len(e.details['writeErrors']):
+            raise
+        return e.details['nInserted'], duplicates
+
+
+# users
+
+def users_add(db, args):
+    doc, error = build_user(vars(args))
+    if error:
+        print(f"Error: {error}")
+        return 1
+    try:
+        db.users.insert_one(doc)
+    except DuplicateKeyError:
+        print(f"Error: student {doc['student_id']} already exists")
+        return 1
+    print(f"Added student {doc['student_id']}.")
+    return 0
+
+
+def users_import(db, args):
+    fmt = detect_format(args.path, args.format)
+    started = time.time()
+    inserted = duplicates = invalid = 0
+    batch = []
+
+    def flush():
+        nonlocal inserted, duplicates
+        added, dupes = insert_users(db, batch)
+        inserted += added
+        duplicates += dupes
+        batch.clear()
+        progress(f"  {inserted} imported, {duplicates} duplicates, {invalid} invalid "
+                 f"({inserted / max(time.time() - started, 1e-6):.0f}/s)")
+
+    with open_stream(args.path) as stream:
+        for line, record in enumerate(read_records(stream, fmt), 1):
+            doc, error = build_user(record)
+            if error:
+                invalid += 1
+                progress(f"  record {line}: {error}")
+                continue
+            batch.append(doc)
+            if len(batch) >= args.batch_size:
+                flush()
+        if batch:
+            flush()
+
+    print(f"Imported {inserted} students ({duplicates} already existed, {invalid} invalid) "
+          f"in {time.time() - started:.1f}s.")
+    return 0 if not invalid else 1
+
+
+def remove_students(db, student_ids, batch_size, admins=False):
+    """Delete students (or admins) and their votes in batches; returns the number removed"""
+    removed = 0
+    batch = []
+
+    def flush():
+        nonlocal removed
+        query = {'student_id': {'$in': batch}, 'is_admin': True if admins else {'$ne': True}}
+        result = db.users.delete_many(query)
+        if not admins:
+            db.votes.delete_many({'student_id': {'$in': batch}})
+        removed += result.deleted_count
+        batch.clear()
+        progress(f"  {removed} removed")
+
+    for student_id in student_ids:
+        batch.append(student_id)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return removed
+
+
+def users_remove(db, args):
+    ids = list(args.student_ids)
+    if args.file:
+        with open_stream(args.file) as stream:
+            ids.extend(line.strip() for line in stream if line.strip())
+    if not ids:
+        print("Error: no student IDs given")
+        return 1
+    removed = remove_students(db, ids, args.batch_size)
+    print(f"Removed {removed} of {len(ids)} students and their votes.")
+    return 0
+
+
+# admins
+
+def admins_add(db, args):
+    doc, error = build_user({**vars(args), 'branch': 'ADMIN', 'section': 'A'}, is_admin=True)
+    if error:
+        print(f"Error: {error}")
+        return 1
+    if db.users.find_one({'student_id': doc['student_id']}, {'_id': 1}):
+        print(f"Admin user {doc['student_id']} already exists!")
+        return 0
+    db.users.insert_one(doc)
+    print(f"Admin user created. Student ID: {doc['student_id']}, Mobile: {doc['mobile']}")
+    return 0
+
+
+def admins_remove(db, args):
+    removed = remove_students(db, args.student_ids, 1000, admins=True)
+    print(f"Removed {removed} of {len(args.student_ids)} admin users.")
+    return 0
+
+
+def admins_list(db, args):
+    for admin in db.users.find({'is_admin': True}, {'_id': 0, 'student_id': 1, 'name': 1, 'mobile': 1}):
+        print(f"{admin['student_id']}  {admin.get('name', '')}  {admin.get('mobile', '')}")
+    return 0
+
+
+# seed / check / indexes / stats
+
+def seed(db, args):
+    import election_import
+
+    if args.path:
+        with open_stream(args.path) as stream:
+            definition = election_import.parse_definition(stream.read(), args.path)
+    else:
+        definition = SAMPLE_BALLOT
+    try:
+        positions, candidates = election_import.apply_definition(db.client, db, definition, replace=args.replace)
+    except election_import.ElectionDefinitionError as e:
+        print("Invalid election definition:")
+        for error in e.errors:
+            print(f"  - {error}")
+        return 1
+    print(f"Seeded {positions} positions and {candidates} candidates.")
+    return 0
+
+
+def check(db, args):
+    db.command('ping')
+    print("MongoDB connection successful!")
+    if args.student_id:
+        user = db.users.find_one({'student_id': args.student_id})
+        if not user:
+            print(f"Student {args.student_id} not found.")
+            return 1
+        for field in ['student_id', 'name', 'mobile', 'branch', 'section', 'has_voted', 'is_admin']:
+            print(f"{field}: {user.get(field)}")
+    if args.consistency:
+        import consistency_check
+
+        report = consistency_check.run(db, args.repair, args.full)
+        print(f"Checked {report['checked']} students in {report['seconds']}s.")
+        for problem, found in report['problems'].items():
+            print(f"  {problem}: {found if isinstance(found, int) else len(found)}")
+        if args.repair:
+            print(f"Repaired {report['repaired']} problems.")
+        return 1 if report['problems'] and not args.repair else 0
+    return 0
+
+
+def indexes(db, args):
+    for name in ensure_indexes(db):
+        print(f"  {name}")
+    print("Indexes are up to date.")
+    return 0
+
+
+def stats(db, args):
+    students = {'is_admin': {'$ne': True}}
+    total = db.users.count_documents(students)
+    voted = db.users.count_documents({**students, 'has_voted': True})
+    print(f"Students: {total}  Voted: {voted}  Turnout: {voted / total * 100 if total else 0:.1f}%")
+    print(f"Positions: {db.positions.count_documents({})}  Candidates: {db.nominees.count_documents({})}  "
+          f"Votes: {db.votes.estimated_document_count()}")
+    rows = db.users.aggregate([
+        {'$match': students},
+        {'$group': {'_id': '$branch', 'total': {'$sum': 1},
+                    'voted': {'$sum': {'$cond': [{'$eq': ['$has_voted', True]}, 1, 0]}}}},
+        {'$sort': {'_id': 1}}
+    ])
+    for row in rows:
+        print(f"  {row['_id']:<10}{row['voted']:>8}/{row['total']:<8}{row['voted'] / row['total'] * 100:>6.1f}%")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='vote4campus', description='Vote4Campus administration.')
+    parser.add_argument('--uri', help='MongoDB URI (default: MONGO_URI or local college_voting)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    users = commands.add_parser('users', help='manage students').add_subparsers(dest='action', required=True)
+    add = users.add_parser('add', help='add one student')
+    for field in STUDENT_FIELDS:
+        add.add_argument(f"--{field.replace('_', '-')}", dest=field, required=True)
+    add.set_defaults(handler=users_add)
+    imp = users.add_parser('import', help='bulk import students from a CSV/JSON lines file or stdin')
+    imp.add_argument('path', help='file path, or - for stdin')
+    imp.add_argument('--format', choices=['csv', 'jsonl'])
+    imp.add_argument('--batch-size', type=int, default=1000)
+    imp.set_defaults(handler=users_import)
+    rm = users.add_parser('remove', help='remove students and their votes')
+    rm.add_argument('student_ids', nargs='*')
+    rm.add_argument('--file', help='file with one student ID per line, or - for stdin')
+    rm.add_argument('--batch-size', type=int, default=1000)
+    rm.set_defaults(handler=users_remove)
+
+    admins = commands.add_parser('admins', help='manage admin users').add_subparsers(dest='action', required=True)
+    add = admins.add_parser('add', help='create an admin user')
+    add.add_argument('--student-id', dest='student_id', required=True)
+    add.add_argument('--name', default='Admin User')
+    add.add_argument('--mobile', required=True)
+    add.set_defaults(handler=admins_add)
+    rm = admins.add_parser('remove', help='remove admin users')
+    rm.add_argument('student_ids', nargs='+')
+    rm.set_defaults(handler=admins_remove)
+    admins.add_parser('list', help='list admin users').set_defaults(handler=admins_list)
+
+    sd = commands.add_parser('seed', help='load a ballot (sample ballot when no file is given)')
+    sd.add_argument('path', nargs='?', help='JSON/YAML election definition, or - for stdin')
+    sd.add_argument('--replace', action='store_true', help='replace existing positions and candidates')
+    sd.set_defaults(handler=seed)
+
+    ck = commands.add_parser('check', help='check the connection, a student, or data consistency')
+    ck.add_argument('--student-id', dest='student_id')
+    ck.add_argument('--consistency', action='store_true', help='run the has_voted/votes consistency check')
+    ck.add_argument('--repair', action='store_true')
+    ck.add_argument('--full', action='store_true')
+    ck.set_defaults(handler=check)
+
+    commands.add_parser('indexes', help='create the indexes the app relies on').set_defaults(handler=indexes)
+    commands.add_parser('stats', help='turnout summary').set_defaults(handler=stats)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(get_db(args.uri), args)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
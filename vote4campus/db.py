@@ -0,0 +1,43 @@
+"""Shared MongoDB connection and index definitions for the CLI and the app"""
+import os
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from vote4campus import idempotency
+
+DEFAULT_URI = 'mongodb://localhost:27017/college_voting'
+
+_client = None
+
+
+def get_client(uri=None):
+    """One pooled client per process, configured from MONGO_URI"""
+    global _client
+    if _client is None:
+        load_dotenv()
+        _client = MongoClient(uri or os.getenv('MONGO_URI', DEFAULT_URI),
+                              maxPoolSize=int(os.getenv('MONGO_POOL_SIZE', 20)))
+    return _client
+
+
+def get_db(uri=None):
+    return get_client(uri).get_default_database('college_voting')
+
+
+def ensure_indexes(db):
+    """Create every index the app relies on; returns the index names"""
+    return [
+        db.users.create_index('student_id', unique=True),
+        db.users.create_index('mobile'),
+        db.users.create_index([('student_id', 1), ('mobile', 1)]),
+        # Incremental consistency checks look up recently voted or touched students
+        db.users.create_index('voted_at', sparse=True),
+        db.users.create_index('touched_at', sparse=True),
+        db.votes.create_index([('user_id', 1), ('nominee_id', 1)]),
+        db.votes.create_index('receipt'),
+        db.votes.create_index('student_id'),
+        db.votes.create_index('leaf_index'),
+        db.dashboard_snapshots.create_index([('snapshot', 1), ('n', 1)]),
+        idempotency.ensure_indexes(db.idempotency_keys),
+    ]
@@ -0,0 +1,85 @@
+"""Idempotency keys for ballot submission.
+
+voting.html sends an Idempotency-Key header generated once per ballot. The
+first request to use a key claims it; once that request succeeds its JSON
+response is stored with the key, so client retries get the stored response
+back from a single lookup instead of re-running validation and writes.
+Failed submissions release their key so a retry runs normally. A claim is a
+lease: if its request never finishes (the worker died), a retry may take the
+key over once the claim is older than CLAIM_LEASE seconds. Keys expire
+through a TTL index on created_at.
+
+The Flask and aiohttp paths share the query builders and decisions here and
+only differ in how they await the driver.
+"""
+import os
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 86400))
+CLAIM_LEASE = int(os.getenv('IDEMPOTENCY_CLAIM_LEASE', 10))
+MAX_KEY_LENGTH = 128
+
+IN_PROGRESS_RESPONSE = {'success': False, 'message': 'Your vote is still being processed. Please wait.'}
+
+
+def scoped_key(user_id, key):
+    """Scope the client-supplied key to the user so keys cannot collide across voters"""
+    return f'{user_id}:{key[:MAX_KEY_LENGTH]}'
+
+
+def claim_time():
+    """Now, truncated to the millisecond precision Mongo stores so finish() can match the claim"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def claim_args(scoped, now):
+    """Arguments for find_one_and_update that claim a fresh key, or one whose claim's lease ran out.
+
+    A key that is in progress or already answered does not match, so the upsert
+    raises DuplicateKeyError; look the record up and replay() it.
+    """
+    return (
+        {'_id': scoped, 'response': {'$exists': False},
+         'claimed_at': {'$lt': now - timedelta(seconds=CLAIM_LEASE)}},
+        {'$set': {'claimed_at': now}, '$setOnInsert': {'created_at': now}},
+    ), {'upsert': True, 'return_document': ReturnDocument.BEFORE}
+
+
+def replay(existing):
+    """(body, status) answering a repeated key: the stored response, or 409 while it is in progress"""
+    if existing and 'response' in existing:
+        return existing['response'], 200
+    return IN_PROGRESS_RESPONSE, 409
+
+
+def finish_args(scoped, claimed_at, data):
+    """(collection method, args) that store a successful response, or release this request's claim"""
+    if data and data.get('success'):
+        # Stored even if a retry took the claim over, so later retries replay the receipt
+        return 'update_one', ({'_id': scoped}, {'$set': {'response': data}})
+    return 'delete_one', ({'_id': scoped, 'claimed_at': claimed_at, 'response': {'$exists': False}},)
+
+
+def claim(collection, scoped):
+    """Claim a key; returns (claimed_at, None) when this request owns it, or (None, record) for a repeat"""
+    now = claim_time()
+    args, kwargs = claim_args(scoped, now)
+    try:
+        collection.find_one_and_update(*args, **kwargs)
+        return now, None
+    except DuplicateKeyError:
+        return None, collection.find_one({'_id': scoped})
+
+
+def finish(collection, scoped, claimed_at, data):
+    method, args = finish_args(scoped, claimed_at, data)
+    getattr(collection, method)(*args)
+
+
+def ensure_indexes(collection):
+    return collection.create_index('created_at', expireAfterSeconds=IDEMPOTENCY_TTL)
@@ -0,0 +1,146 @@
+"""In-memory bitset index of the voter roll.
+
+Every student gets a dense integer slot, and the roll is a handful of
+bitsets over those slots (one bit per student):
+
+  active              slot holds a current, non-admin student
+  voted               has_voted is set
+  branches[branch]    student belongs to the branch
+  sections[section]   student belongs to the section
+
+Turnout for any branch/section combination is a popcount over AND-ed bitsets
+and non-voters are the set bits of active & group & ~voted, so neither needs
+a scan of users or votes. 100k students take 12.5 KB per bitset.
+
+The roll is built with one projected scan of users and kept current by the
+routes that change voting status. Each worker keeps its own copy, resynced in
+the background as described in resync_index.
+"""
+from resync_index import ResyncingIndex
+
+
+def set_bit(bits, slot):
+    index = slot >> 3
+    if index >= len(bits):
+        bits.extend(bytes(index + 1 - len(bits)))
+    bits[index] |= 1 << (slot & 7)
+
+
+def clear_bit(bits, slot):
+    index = slot >> 3
+    if index < len(bits):
+        bits[index] &= ~(1 << (slot & 7)) & 0xFF
+
+
+def iter_bits(mask):
+    """Set bit positions of an int, in increasing order"""
+    for index, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, 'little')):
+        while byte:
+            low = byte & -byte
+            yield (index << 3) + low.bit_length() - 1
+            byte ^= low
+
+
+class VoterRoll(ResyncingIndex):
+    name = 'voter roll'
+
+    def __init__(self, get_users, resync_interval=300):
+        super().__init__(get_users, resync_interval)
+        self.slots = {}  # student_id -> slot
+        self.student_ids = []  # slot -> student_id (None once removed)
+        self.active = bytearray()
+        self.voted = bytearray()
+        self.branches = {}
+        self.sections = {}
+
+    def load(self):
+        roll = VoterRoll(self.get_users)
+        cursor = self.get_users().find(
+            {'is_admin': {'$ne': True}},
+            {'_id': 0, 'student_id': 1, 'branch': 1, 'section': 1, 'has_voted': 1})
+        for user in cursor:
+            roll._add(user['student_id'], user.get('branch'), user.get('section'), user.get('has_voted', False))
+        return roll
+
+    def adopt(self, roll):
+        self.slots, self.student_ids = roll.slots, roll.student_ids
+        self.active, self.voted = roll.active, roll.voted
+        self.branches, self.sections = roll.branches, roll.sections
+
+    def describe(self):
+        return f"Voter roll built with {len(self.slots)} students ({self.memory_bytes()} bytes of bitsets)"
+
+    # Updates
+
+    def _add(self, student_id, branch, section, has_voted=False):
+        slot = self.slots.get(student_id)
+        if slot is None:
+            slot = len(self.student_ids)
+            self.slots[student_id] = slot
+            self.student_ids.append(student_id)
+        set_bit(self.active, slot)
+        set_bit(self.branches.setdefault(branch, bytearray()), slot)
+        set_bit(self.sections.setdefault(section, bytearray()), slot)
+        (set_bit if has_voted else clear_bit)(self.voted, slot)
+
+    def _remove(self, student_id):
+        # The slot stays allocated until the next rebuild compacts the roll
+        slot = self.slots.pop(student_id, None)
+        if slot is not None:
+            self.student_ids[slot] = None
+            clear_bit(self.active, slot)
+            clear_bit(self.voted, slot)
+
+    def _mark_voted(self, student_id, voted):
+        slot = self.slots.get(student_id)
+        if slot is not None:
+            (set_bit if voted else clear_bit)(self.voted, slot)
+
+    def _reset_votes(self):
+        self.voted = bytearray(len(self.voted))
+
+    def add(self, student_id, branch, section, has_voted=False):
+        self._record('_add', student_id, branch, section, has_voted)
+
+    def remove(self, student_id):
+        self._record('_remove', student_id)
+
+    def mark_voted(self, student_id, voted=True):
+        self._record('_mark_voted', student_id, voted)
+
+    def reset_votes(self):
+        self._record('_reset_votes')
+
+    # Queries
+
+    def group_mask(self, branch=None, section=None):
+        """Bitset (as an int) of the active students in a branch and/or section"""
+        self.ensure_current()
+        mask = int.from_bytes(self.active, 'little')
+        if branch:
+            mask &= int.from_bytes(self.branches.get(branch, b''), 'little')
+        if section:
+            mask &= int.from_bytes(self.sections.get(section, b''), 'little')
+        return mask
+
+    def turnout(self, branch=None, section=None):
+        mask = self.group_mask(branch, section)
+        total = mask.bit_count()
+        voted = (mask & int.from_bytes(self.voted, 'little')).bit_count()
+        return {'total': total, 'voted': voted, 'not_voted': total - voted}
+
+    def non_voters(self, branch=None, section=None, page=1, per_page=100):
+        """One page of student_ids that have not voted, plus the total count"""
+        mask = self.group_mask(branch, section) & ~int.from_bytes(self.voted, 'little')
+        start = (page - 1) * per_page
+        student_ids = []
+        for i, slot in enumerate(iter_bits(mask)):
+            if i >= start + per_page:
+                break
+            if i >= start:
+                student_ids.append(self.student_ids[slot])
+        return student_ids, mask.bit_count()
+
+    def memory_bytes(self):
+        bitsets = [self.active, self.voted, *self.branches.values(), *self.sections.values()]
+        return sum(len(bits) for bits in bitsets)